@@ -0,0 +1,54 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from app.api.v1.endpoints.matches import get_database_service
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.database import DatabaseService
+from app.services.leaderboard import LeaderboardService
+
+router = APIRouter()
+
+# Clasificaciones por (competición, ronda, límite). Los totales los mantiene la
+# liquidación del worker; aquí solo se leen las filas mostradas.
+leaderboard_cache = TTLCache(
+    ttl=settings.LEADERBOARD_CACHE_TTL_SECONDS,
+    stale_ttl=settings.LEADERBOARD_CACHE_STALE_SECONDS,
+    max_entries=256,
+)
+
+
+@router.get("")
+async def get_leaderboard_endpoint(
+    response: Response,
+    competition_id: Optional[int] = None,
+    round: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=settings.LEADERBOARD_MAX_LIMIT),
+    db: DatabaseService = Depends(get_database_service),
+):
+    """
+    Clasificación de usuarios por puntos: global, de una competición
+    (`competition_id`) o de una ronda de una competición (`competition_id`
+    y `round`, p. ej. "final").
+    """
+    if round is not None and competition_id is None:
+        raise HTTPException(status_code=400, detail="round requiere competition_id")
+
+    leaderboard = LeaderboardService(db)
+    try:
+        rows, age, cache_state = await leaderboard_cache.get(
+            (competition_id, round, limit), lambda: leaderboard.top(competition_id, round, limit)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    response.headers["X-Cache"] = cache_state
+    response.headers["Age"] = str(int(age))
+    return [{"rank": rank, **row} for rank, row in enumerate(rows, start=1)]
+
+
+@router.get("/metrics")
+async def get_leaderboard_metrics_endpoint():
+    """Métricas de la caché de /leaderboard."""
+    return leaderboard_cache.metrics()
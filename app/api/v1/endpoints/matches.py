@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from app.core.config import settings
+from app.services.cache import TTLCache
 from app.services.scraper import ScraperService
 from app.schemas.match import CompetitionData
 from app.services.database import DatabaseService
@@ -8,26 +11,71 @@ router = APIRouter()
 
 # Instanciamos el servicio (en apps grandes usaríamos Depends() para inyectarlo)
 scraper_service = ScraperService()
-database_service = DatabaseService()
+
+# La persistencia se crea en la primera petición que la usa (Supabase o SQLite
+# según STORAGE_BACKEND): importar el router no exige credenciales de Supabase.
+database_service: Optional[DatabaseService] = None
+
+
+def get_database_service() -> DatabaseService:
+    global database_service
+    if database_service is None:
+        database_service = DatabaseService()
+    return database_service
+
+# Respuestas de /live por fecha: los lectores reciben la copia cacheada al momento
+# y, si está caducada, un único refresco en segundo plano consulta a FotMob.
+live_cache = TTLCache(ttl=settings.LIVE_CACHE_TTL_SECONDS, stale_ttl=settings.LIVE_CACHE_STALE_SECONDS)
 
 @router.get("/live", response_model=List[CompetitionData])
-async def get_live_matches_endpoint():
+async def get_live_matches_endpoint(
+    response: Response,
+    date: Optional[str] = Query(None, pattern=r"^\d{8}$", description="Fecha YYYYMMDD"),
+):
     """
-    Devuelve los partidos de hoy agrupados por liga (LIVE/NS/FT).
-    Útil para testear el ScraperService.
+    Devuelve los partidos de hoy (o de `date`, formato YYYYMMDD) agrupados
+    por liga (LIVE/NS/FT). Útil para testear el ScraperService.
     """
+    # La fecha acaba en la clave de caché y en la URL de FotMob: solo fechas reales
+    if date is not None:
+        try:
+            datetime.strptime(date, "%Y%m%d")
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Fecha inválida: {date}")
+    date_str = date or datetime.now().strftime("%Y%m%d")
     try:
-        data = await scraper_service.get_live_matches_fotmob()
-        return data
+        data, age, cache_state = await live_cache.get(
+            date_str, lambda: scraper_service.get_live_matches_fotmob(target_date=date_str)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    response.headers["X-Cache"] = cache_state
+    response.headers["Age"] = str(int(age))
+    return data
+
+
+@router.get("/metrics")
+async def get_metrics_endpoint(db: DatabaseService = Depends(get_database_service)):
+    """
+    Métricas de la caché de /live (hits/misses/edad por fecha), del
+    tráfico hacia FotMob y de las escrituras diferidas en Supabase.
+    """
+    return {
+        "live_cache": live_cache.metrics(),
+        "scraper": scraper_service.metrics(),
+        "database": db.metrics(),
+    }
+
 
 @router.get("/sync")
-async def sync_matches_manual():
+async def sync_matches_manual(force: bool = False, db: DatabaseService = Depends(get_database_service)):
     """
     Dispara manualmente la actualización de datos:
-    Scraper (FotMob) -> Python -> Supabase
+    Scraper (FotMob) -> Python -> Supabase (o SQLite)
+
+    Por defecto solo se escriben los partidos que cambiaron; `force=true`
+    reescribe todos.
     """
     try:
         # 1. Obtener datos en vivo
@@ -37,10 +85,16 @@ async def sync_matches_manual():
             return {"status": "warning", "message": "No matches found to sync"}
 
         # 2. Guardar en Supabase
-        count = database_service.save_matches(data)
+        stats = await db.save_matches(data, force=force)
         
-        return {"status": "success", "matches_synced": count}
+        return {
+            "status": "success",
+            "matches_synced": stats["matches"],
+            "skipped_unchanged": stats["skipped_unchanged"],
+            "round_trips": stats["round_trips"],
+            "bytes_sent": stats["bytes_sent"],
+        }
     
     except Exception as e:
         print(f"Error en sync: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,9 +7,77 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     
     # Aquí pondrás tus claves de Supabase o Oracle en el futuro
-    SUPABASE_URL: str
-    SUPABASE_KEY: str
-    SUPABASE_SERVICE_ROLE_KEY: str
+    # (solo obligatorias con STORAGE_BACKEND="supabase")
+    SUPABASE_URL: Optional[str] = None
+    SUPABASE_KEY: Optional[str] = None
+    SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None
+
+    # Backend de persistencia: "supabase" o "sqlite" (réplica local para pruebas de carga offline)
+    STORAGE_BACKEND: str = "supabase"
+    SQLITE_PATH: str = "quinisindic.db"
+
+    # Cliente HTTP compartido hacia FotMob (pool keep-alive + HTTP/2)
+    FOTMOB_HTTP2: bool = True
+    FOTMOB_MAX_CONNECTIONS: int = 20
+    FOTMOB_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    FOTMOB_KEEPALIVE_EXPIRY: float = 60.0
+    FOTMOB_CONNECT_TIMEOUT: float = 5.0
+    FOTMOB_READ_TIMEOUT: float = 15.0
+    FOTMOB_POOL_TIMEOUT: float = 10.0
+
+    # Limitador adaptativo compartido por todo el tráfico hacia FotMob
+    FOTMOB_RATE_INITIAL: float = 5.0   # peticiones/s al arrancar
+    FOTMOB_RATE_MIN: float = 0.5
+    FOTMOB_RATE_MAX: float = 20.0
+    FOTMOB_RATE_BURST: float = 5.0
+    FOTMOB_MAX_IN_FLIGHT: int = 6
+    FOTMOB_LATENCY_TARGET: float = 2.0  # segundos
+    FOTMOB_MAX_RETRIES: int = 2
+
+    # Archivo de respuestas crudas: "off", "record" (graba lo que llega de la red)
+    # o "replay" (sirve lo grabado sin red, p. ej. para benchmarks)
+    FOTMOB_ARCHIVE_MODE: str = "off"
+    FOTMOB_ARCHIVE_DIR: str = "fotmob_archive"
+
+    # Cliente async de Supabase: peticiones simultáneas (y tamaño del pool) y timeout
+    DB_MAX_CONCURRENCY: int = 8
+    DB_TIMEOUT: float = 30.0
+
+    # Escrituras en Supabase: filas máximas por petición de upsert en bloque
+    DB_UPSERT_BATCH_SIZE: int = 500
+    # Solo se reenvían partidos cuya huella cambió; cada tanto se reescribe todo
+    DB_FULL_RESYNC_SECONDS: float = 3600.0
+    # Carga masiva (seed de temporadas): chunks acotados, paralelismo, reintentos y checkpoints
+    DB_BULK_CHUNK_ROWS: int = 250
+    DB_BULK_CHUNK_BYTES: int = 512 * 1024
+    DB_BULK_PARALLELISM: int = 4
+    DB_BULK_RETRIES: int = 3
+    DB_BULK_RETRY_DELAY: float = 1.0
+    SEED_CHECKPOINT_DIR: str = ".seed_checkpoints"
+
+    # Liquidación en bloque: partidos por consulta in_() (acota la longitud de la URL)
+    SETTLEMENT_MATCH_CHUNK: int = 50
+    # Predicciones por página al liquidar (paginación por id; <= max-rows de PostgREST)
+    SETTLEMENT_PAGE_SIZE: int = 1000
+
+    # Reglas de puntuación por competición/ronda sobre las por defecto (3/1/0), en JSON. Claves
+    # "default", "<competition_id>", "*:<ronda>" y "<competition_id>:<ronda>"; campos de
+    # app/services/scoring.ScoringRules (se validan al arrancar). P. ej. finales dobles y bonus por diferencia en la Champions:
+    # SCORING_RULES='{"*:final": {"multiplier": 2}, "42": {"goal_diff_bonus": 1}}'
+    SCORING_RULES: dict[str, dict[str, int]] = {}
+
+    # Write-behind de eventos y clasificaciones: flush por tamaño o por antigüedad
+    DB_WRITE_BEHIND_MAX_ROWS: int = 100
+    DB_WRITE_BEHIND_MAX_DELAY: float = 2.0
+
+    # Caché del endpoint /live (por fecha) con stale-while-revalidate
+    LIVE_CACHE_TTL_SECONDS: float = 15.0
+    LIVE_CACHE_STALE_SECONDS: float = 120.0
+
+    # Caché del endpoint /leaderboard (por ámbito) con stale-while-revalidate
+    LEADERBOARD_CACHE_TTL_SECONDS: float = 30.0
+    LEADERBOARD_CACHE_STALE_SECONDS: float = 300.0
+    LEADERBOARD_MAX_LIMIT: int = 200
 
     class Config:
         env_file = ".env"
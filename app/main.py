@@ -1,10 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.v1.endpoints import matches
+from app.api.v1.endpoints import leaderboard, matches
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Al apagar la API cerramos los pools de conexiones (FotMob y Supabase/SQLite)
+    await matches.scraper_service.aclose()
+    if matches.database_service is not None:
+        await matches.database_service.aclose()
 
 # --- ESTA ES LA LÍNEA QUE UVICORN ESTÁ BUSCANDO ---
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 # --------------------------------------------------
 
 # Configurar CORS (para que tu Next.js pueda conectarse)
@@ -23,6 +33,7 @@ app.add_middleware(
 
 # Incluir las rutas
 app.include_router(matches.router, prefix=f"{settings.API_V1_STR}/matches", tags=["matches"])
+app.include_router(leaderboard.router, prefix=f"{settings.API_V1_STR}/leaderboard", tags=["leaderboard"])
 
 @app.get("/")
 def root():
@@ -1,6 +1,6 @@
 from enum import IntEnum, Enum
 from typing import List, Optional, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 # Usamos IntEnum para que al serializar a JSON salga el número, igual que en TS
 class MatchEventType(IntEnum):
@@ -15,6 +15,9 @@ class MatchEventType(IntEnum):
     None_ = 0 
 
 class TeamInfo(BaseModel):
+    # Inmutable: las instancias internadas se comparten entre partidos y ciclos
+    model_config = ConfigDict(frozen=True)
+
     id: int
     name: str
     abbr: str
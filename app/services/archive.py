@@ -0,0 +1,160 @@
+"""
+Archivo de respuestas crudas de FotMob para grabar y reproducir sin red.
+
+Estructura en disco (content-addressed, cuerpos comprimidos con zlib):
+
+    <root>/index.jsonl            una línea por respuesta grabada, en orden
+    <root>/objects/ab/abcd....z   cuerpo comprimido, nombrado por su sha256
+
+Los cuerpos idénticos (p. ej. el feed diario sin cambios entre ciclos) se
+guardan una sola vez. En reproducción los objetos se leen con mmap.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger("Archive")
+
+# Cabeceras que no tienen sentido al reproducir un cuerpo ya descomprimido
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def request_key(request: httpx.Request) -> str:
+    return f"{request.method} {request.url}"
+
+
+class ResponseArchive:
+    def __init__(self, root: str | os.PathLike, cache_size: int = 256) -> None:
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._cache_size = cache_size
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.z"
+
+    def put(self, key: str, status: int, headers: dict[str, str], body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(zlib.compress(body, 6))
+            tmp.replace(path)
+
+        entry = {"key": key, "status": status, "headers": headers, "digest": digest, "ts": time.time()}
+        with self.index_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def entries(self) -> list[dict]:
+        if not self.index_path.exists():
+            return []
+        with self.index_path.open(encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def read(self, digest: str) -> bytes:
+        body = self._cache.get(digest)
+        if body is not None:
+            self._cache.move_to_end(digest)
+            return body
+
+        path = self._object_path(digest)
+        with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            body = zlib.decompress(mapped)
+
+        self._cache[digest] = body
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return body
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transporte que delega en la red y guarda cada respuesta en el archivo."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, archive: ResponseArchive) -> None:
+        self.inner = inner
+        self.archive = archive
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        # aread() ya devuelve el cuerpo descomprimido (gzip/br)
+        body = await response.aread()
+        await response.aclose()
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS}
+        self.archive.put(request_key(request), response.status_code, headers, body)
+        return httpx.Response(response.status_code, headers=headers, content=body, extensions=response.extensions)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte sin red que sirve las respuestas grabadas. Las grabaciones de
+    una misma URL se sirven en orden (reproduciendo la evolución de una
+    jornada) y al agotarse se repite la última.
+
+    Por defecto solo se sirve la URL exacta: una petición no grabada recibe
+    un 404, nunca la grabación de otro partido o liga. Con path_fallback=True,
+    una URL no grabada se sirve con las grabaciones del mismo path, solo para
+    los paths de fallback_paths si se dan (p. ej. el feed `matches?date=` de
+    "hoy" en otra fecha) o para todos si no.
+    """
+
+    def __init__(
+        self,
+        archive: ResponseArchive,
+        path_fallback: bool = False,
+        fallback_paths: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.archive = archive
+        self.path_fallback = path_fallback
+        self.fallback_paths = set(fallback_paths) if fallback_paths is not None else None
+        self._warned_fallbacks: set[str] = set()
+        self._by_key: dict[str, list[dict]] = defaultdict(list)
+        self._by_path: dict[str, list[dict]] = defaultdict(list)
+        for entry in archive.entries():
+            self._by_key[entry["key"]].append(entry)
+            method, _, url = entry["key"].partition(" ")
+            self._by_path[f"{method} {httpx.URL(url).path}"].append(entry)
+        self._cursors: dict[str, int] = defaultdict(int)
+
+    def _lookup(self, request: httpx.Request) -> Optional[tuple[str, list[dict]]]:
+        key = request_key(request)
+        if key in self._by_key:
+            return key, self._by_key[key]
+        if not self.path_fallback:
+            return None
+        if self.fallback_paths is not None and request.url.path not in self.fallback_paths:
+            return None
+        path_key = f"{request.method} {request.url.path}"
+        if path_key not in self._by_path:
+            return None
+        if key not in self._warned_fallbacks:
+            self._warned_fallbacks.add(key)
+            logger.warning("Replay sin grabación exacta para %s, se sirve otra de %s", key, path_key)
+        return path_key, self._by_path[path_key]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        found = self._lookup(request)
+        if found is None:
+            logger.warning("Replay sin grabación para %s", request_key(request))
+            return httpx.Response(404, request=request)
+
+        key, recordings = found
+        cursor = self._cursors[key]
+        entry = recordings[min(cursor, len(recordings) - 1)]
+        self._cursors[key] = cursor + 1
+        return httpx.Response(entry["status"], headers=entry["headers"], content=self.archive.read(entry["digest"]))
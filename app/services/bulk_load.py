@@ -0,0 +1,92 @@
+"""
+Carga masiva reanudable de temporadas completas (seed).
+
+Los partidos se parten en chunks acotados en filas y en bytes, que se
+escriben con paralelismo limitado y reintentos por chunk. Cada chunk escrito
+se apunta en un checkpoint en disco por su huella de contenido, de modo que
+si el seed se cae, al relanzarlo se saltan los chunks ya escritos (si los
+datos no han cambiado) y se continúa donde se quedó.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("BulkLoad")
+
+
+def chunk_key(table: str, rows: list[dict]) -> str:
+    payload = json.dumps(rows, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return f"{table}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+
+def iter_chunks(rows: list[dict], max_rows: int, max_bytes: int) -> Iterator[list[dict]]:
+    """Parte rows en chunks de como mucho max_rows filas y ~max_bytes de JSON."""
+    chunk: list[dict] = []
+    size = 0
+    for row in rows:
+        row_size = len(json.dumps(row, ensure_ascii=False, separators=(",", ":"), default=str).encode()) + 1
+        if chunk and (len(chunk) >= max_rows or size + row_size > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        yield chunk
+
+
+class BulkCheckpoint:
+    """Conjunto de chunks ya escritos, persistido en un fichero JSON."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = Path(path)
+        self._done: set[str] = set()
+        if self.path.exists():
+            self._done = set(json.loads(self.path.read_text(encoding="utf-8")))
+            logger.info("Checkpoint %s: %s chunks ya escritos", self.path, len(self._done))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._done
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def mark(self, key: str) -> None:
+        self._done.add(key)
+        # Escritura atómica: un crash a mitad no deja el checkpoint corrupto
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(sorted(self._done)), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def clear(self) -> None:
+        """Borra el checkpoint (al terminar una carga completa sin fallos)."""
+        self._done.clear()
+        self.path.unlink(missing_ok=True)
+
+
+async def retry_chunk(write, chunk: list[dict], retries: int, base_delay: float) -> int:
+    """Escribe un chunk reintentando con backoff exponencial. Devuelve los reintentos usados."""
+    for attempt in range(retries + 1):
+        try:
+            await write(chunk)
+            return attempt
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = base_delay * 2 ** attempt
+            logger.warning("Chunk de %s filas falló (%s), reintento %s/%s en %.1fs", len(chunk), e, attempt + 1, retries, delay)
+            await asyncio.sleep(delay)
+    return retries
+
+
+def default_checkpoint(name: str) -> Optional[BulkCheckpoint]:
+    """Checkpoint <SEED_CHECKPOINT_DIR>/<name>.json, o None si están desactivados."""
+    if not settings.SEED_CHECKPOINT_DIR:
+        return None
+    return BulkCheckpoint(Path(settings.SEED_CHECKPOINT_DIR) / f"{name}.json")
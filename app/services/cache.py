@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from app.services.singleflight import SingleFlight
+
+logger = logging.getLogger("Cache")
+
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+
+
+class TTLCache:
+    """
+    Caché en memoria con TTL y stale-while-revalidate.
+
+    - Edad <= ttl: se sirve el valor (HIT).
+    - ttl < edad <= ttl + stale_ttl: se sirve el valor viejo al momento
+      (STALE) y se lanza un único refresco en segundo plano.
+    - Sin valor o demasiado viejo: se carga esperando (MISS); las cargas
+      concurrentes de la misma clave se deduplican.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int = 64) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._loads = SingleFlight()
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> tuple[Any, float, str]:
+        """Devuelve (valor, edad en segundos, HIT/STALE/MISS)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age <= self.ttl:
+                self.hits += 1
+                return value, age, HIT
+            if age <= self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key, loader)
+                return value, age, STALE
+
+        self.misses += 1
+        value = await self._loads.do(key, lambda: self._load(key, loader))
+        return value, 0.0, MISS
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        task = asyncio.ensure_future(self._loads.do(key, lambda: self._load(key, loader)))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda t: self._refresh_done(key, t))
+
+    def _refresh_done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._refreshing.pop(key, None)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            # Seguimos sirviendo el valor viejo hasta que caduque del todo
+            self.refresh_errors += 1
+            logger.warning("Background refresh failed for %s: %s", key, exc)
+
+    def age(self, key: Hashable) -> Optional[float]:
+        entry = self._entries.get(key)
+        return time.monotonic() - entry[1] if entry else None
+
+    def metrics(self) -> dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+            "refresh_errors": self.refresh_errors,
+            "refreshing": len(self._refreshing),
+            "entries": {str(key): round(self.age(key), 1) for key in self._entries},
+        }
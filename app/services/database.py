@@ -1,152 +1,352 @@
-from supabase import create_client, Client
+import asyncio
+import json
+import time
+from typing import Any, Callable, Optional
+
 from app.core.config import settings
 from app.schemas.match import MatchData, CompetitionData
+from app.services.bulk_load import BulkCheckpoint, chunk_key, iter_chunks, retry_chunk
+from app.services.interning import competition_row, team_payload
+from app.services.storage import StorageBackend, build_storage_backend
+from app.services.write_behind import WriteBehindBuffer
+
+SOCCER_SPORT_ID = 1
+
+
+def _json_size(rows: list[dict]) -> int:
+    """Bytes del cuerpo JSON tal y como lo serializa httpx (compacto, UTF-8)."""
+    return len(json.dumps(rows, ensure_ascii=False, separators=(",", ":"), default=str).encode())
+
+
+def _match_row(comp_id: int, match: MatchData) -> dict:
+    """Fila de la tabla matches para un partido."""
+    # Parseamos el string de kickoff a objeto datetime si es necesario, 
+    # o dejamos que Postgres lo haga si el formato es ISO correcto.
+
+    # Convertimos tus modelos Pydantic a dict para JSONB
+    # (los equipos internados ya traen su dict serializado, de solo lectura:
+    # la fila lleva su propia copia)
+    home_team_json = dict(team_payload(match.homeTeam))
+    away_team_json = dict(team_payload(match.awayTeam))
+
+    # Extraemos el score numérico del string "2-1" si es necesario
+    # (Asumo que tu scraper ya maneja lógica de score, sino aquí lo refinas)
+    h_score, a_score = 0, 0
+    try:
+        parts = match.result.split("-")
+        if len(parts) == 2:
+            h_score = int(parts[0])
+            a_score = int(parts[1])
+    except:
+        pass
+
+    return {
+        "id": match.id,
+        "competition_id": comp_id,
+        "sport_id": SOCCER_SPORT_ID,
+        "status": match.status,
+        "kickoff": match.kickoff_iso, # NECESITAS pasar fecha ISO aquí, no "HH:MM"
+        "minute": match.minute,
+        "round": match.round,
+        "home_team_id": match.homeId,
+        "away_team_id": match.awayId,
+        "home_score": h_score,
+        "away_score": a_score,
+        "home_team_data": home_team_json,
+        "away_team_data": away_team_json,
+        "updated_at": "now()"
+    }
+
 
 class DatabaseService:
-    def __init__(self):
-        self.supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        # Supabase o SQLite según STORAGE_BACKEND. No abre conexiones hasta la
+        # primera escritura; se cierra con aclose().
+        self.backend = backend or build_storage_backend()
+        # Huella de la última fila escrita con éxito, por id (dirty tracking de save_matches)
+        self._competition_fingerprints: dict[int, tuple] = {}
+        self._match_fingerprints: dict[int, tuple] = {}
+        self._last_full_sync: Optional[float] = None
+
+        # Eventos y clasificaciones se escriben en diferido y coalescidos por fila
+        self.events_buffer = WriteBehindBuffer(
+            "match_events",
+            self._flush_match_events,
+            settings.DB_WRITE_BEHIND_MAX_ROWS,
+            settings.DB_WRITE_BEHIND_MAX_DELAY,
+        )
+        self.standings_buffer = WriteBehindBuffer(
+            "standings",
+            self._flush_standings,
+            settings.DB_WRITE_BEHIND_MAX_ROWS,
+            settings.DB_WRITE_BEHIND_MAX_DELAY,
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "events_buffer": self.events_buffer.metrics(),
+            "standings_buffer": self.standings_buffer.metrics(),
+        }
+
+    async def drain(self) -> None:
+        """Vuelca las escrituras diferidas pendientes."""
+        await asyncio.gather(self.events_buffer.drain(), self.standings_buffer.drain())
+
+    async def aclose(self) -> None:
+        """Vuelca lo pendiente y cierra el pool de conexiones. Llamar al apagar el worker/API."""
+        await self.drain()
+        await self.backend.aclose()
 
-    def save_matches(self, competitions: list[CompetitionData]):
+    def full_sync_due(self, now: Optional[float] = None) -> bool:
+        """
+        True si toca la resincronización completa (DB_FULL_RESYNC_SECONDS). El
+        worker la usa para llamar a save_matches aunque el feed no haya cambiado.
+        """
+        if self._last_full_sync is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self._last_full_sync >= settings.DB_FULL_RESYNC_SECONDS
+
+    async def save_matches(
+        self,
+        competitions: list[CompetitionData],
+        batch_size: Optional[int] = None,
+        force: bool = False,
+    ) -> dict:
         """
         Guarda (Upsert) competiciones y partidos en la DB.
+
+        Junta las filas de todas las competiciones y escribe cada tabla en
+        bloques de como mucho batch_size filas (DB_UPSERT_BATCH_SIZE), en vez
+        de dos peticiones por competición.
+
+        Solo se envían las filas cuya huella (estado, marcador, minuto,
+        jornada, kickoff) cambió desde la última escritura correcta. Con
+        force=True, o cada DB_FULL_RESYNC_SECONDS, se reescribe todo.
+
+        Devuelve estadísticas: filas enviadas por tabla, partidos sin cambios
+        omitidos, round trips y bytes enviados.
         """
-        total_matches = 0
+        batch_size = batch_size or settings.DB_UPSERT_BATCH_SIZE
+
+        now = time.monotonic()
+        full_sync = force or self.full_sync_due(now)
+        if full_sync:
+            self._competition_fingerprints.clear()
+            self._match_fingerprints.clear()
+            self._last_full_sync = now
 
-        SOCCER_SPORT_ID = 1
+        # Por id: una misma fila repetida en un upsert en bloque hace fallar a Postgres
+        competition_rows: dict[int, dict] = {}
+        match_rows: dict[int, dict] = {}
+        # Huellas de las filas a enviar; se confirman lote a lote tras escribir
+        pending: dict[tuple[str, int], tuple] = {}
+        skipped = 0
 
         for comp in competitions:
-            # 1. Guardar Competición (si no existe)
-            comp_data = {
-                "id": int(comp.id),
-                "name": comp.name,
-                "badge": comp.badge,
-                "sport_id": SOCCER_SPORT_ID,
-                # "country": ... (si lo tuvieras en el objeto competition)
-            }
-            # upsert: inserta o actualiza si ya existe
-            self.supabase.table("competitions").upsert(comp_data).execute()
-
-            # 2. Guardar Partidos
-            matches_to_upsert = []
+            # 1. Competición (si no existe o cambió)
+            comp_id = int(comp.id)
+            comp_fingerprint = (comp.name, comp.badge)
+            if self._competition_fingerprints.get(comp_id) != comp_fingerprint:
+                competition_rows[comp_id] = competition_row(comp_id, comp.name, comp.badge, SOCCER_SPORT_ID)
+                pending[("competitions", comp_id)] = comp_fingerprint
+
+            # 2. Partidos
             for match in comp.matches:
-                # Preparamos el objeto para Supabase
-                # Parseamos el string de kickoff a objeto datetime si es necesario, 
-                # o dejamos que Postgres lo haga si el formato es ISO correcto.
-                
-                # Convertimos tus modelos Pydantic a dict para JSONB
-                home_team_json = match.homeTeam.model_dump()
-                away_team_json = match.awayTeam.model_dump()
-                
-                # Extraemos el score numérico del string "2-1" si es necesario
-                # (Asumo que tu scraper ya maneja lógica de score, sino aquí lo refinas)
-                h_score, a_score = 0, 0
-                try:
-                    parts = match.result.split("-")
-                    if len(parts) == 2:
-                        h_score = int(parts[0])
-                        a_score = int(parts[1])
-                except:
-                    pass
-
-                row = {
-                    "id": match.id,
-                    "competition_id": int(comp.id),
-                    "sport_id": SOCCER_SPORT_ID,
-                    "status": match.status,
-                    "kickoff": match.kickoff_iso, # NECESITAS pasar fecha ISO aquí, no "HH:MM"
-                    "minute": match.minute,
-                    "round": match.round,
-                    "home_team_id": match.homeId,
-                    "away_team_id": match.awayId,
-                    "home_score": h_score,
-                    "away_score": a_score,
-                    "home_team_data": home_team_json,
-                    "away_team_data": away_team_json,
-                    "updated_at": "now()"
-                }
-                matches_to_upsert.append(row)
-                total_matches += 1
-            
-            if matches_to_upsert:
-                # Insertamos en bloque para eficiencia
-                self.supabase.table("matches").upsert(matches_to_upsert).execute()
-
-        print(f"✅ Guardados datos de {len(competitions)} competiciones.")
-        return total_matches
-
-    def save_standings(self, league_id: int, standings_data: list):
+                fingerprint = (match.status, match.result, match.minute, match.round, match.kickoff_iso)
+                if self._match_fingerprints.get(match.id) == fingerprint:
+                    skipped += 1
+                    continue
+                pending[("matches", match.id)] = fingerprint
+
+                match_rows[match.id] = _match_row(comp_id, match)
+
+        stats = {
+            "competitions": len(competition_rows),
+            "matches": len(match_rows),
+            "skipped_unchanged": skipped,
+            "full_sync": full_sync,
+            "round_trips": 0,
+            "bytes_sent": 0,
+        }
+        # Solo tras escribir cada lote: si falla, esas filas se reenvían en el siguiente ciclo
+        def competitions_written(batch: list[dict]) -> None:
+            for row in batch:
+                self._competition_fingerprints[row["id"]] = pending[("competitions", row["id"])]
+
+        def matches_written(batch: list[dict]) -> None:
+            for row in batch:
+                self._match_fingerprints[row["id"]] = pending[("matches", row["id"])]
+
+        # Competiciones primero: los partidos las referencian
+        await self._upsert_in_batches(
+            "competitions", list(competition_rows.values()), batch_size, stats, competitions_written
+        )
+        await self._upsert_in_batches("matches", list(match_rows.values()), batch_size, stats, matches_written)
+
+        print(
+            f"✅ Guardados datos de {stats['competitions']} competiciones y {stats['matches']} partidos "
+            f"({skipped} sin cambios, {stats['round_trips']} peticiones, {stats['bytes_sent'] / 1024:.1f} KiB)."
+        )
+        return stats
+
+    async def bulk_load_matches(
+        self,
+        competitions: list[CompetitionData],
+        checkpoint: Optional[BulkCheckpoint] = None,
+    ) -> dict:
+        """
+        Carga masiva para seeds de temporadas completas. Parte las filas en
+        chunks (DB_BULK_CHUNK_ROWS / DB_BULK_CHUNK_BYTES), los escribe con
+        DB_BULK_PARALLELISM chunks en paralelo y reintenta cada chunk por
+        separado. Con checkpoint, los chunks ya escritos en una ejecución
+        anterior se saltan y cada chunk nuevo se apunta al terminar.
+
+        Devuelve estadísticas; los chunks que agotan los reintentos se cuentan
+        en failed_chunks (y no se apuntan, así que un relanzamiento los repite).
+        """
+        competition_rows: dict[int, dict] = {}
+        match_rows: dict[int, dict] = {}
+        for comp in competitions:
+            comp_id = int(comp.id)
+            competition_rows[comp_id] = competition_row(comp_id, comp.name, comp.badge, SOCCER_SPORT_ID)
+            for match in comp.matches:
+                match_rows[match.id] = _match_row(comp_id, match)
+
+        stats = {
+            "competitions": len(competition_rows),
+            "matches": len(match_rows),
+            "chunks": 0,
+            "skipped_chunks": 0,
+            "failed_chunks": 0,
+            "retries": 0,
+            "bytes_sent": 0,
+        }
+        parallel = asyncio.Semaphore(settings.DB_BULK_PARALLELISM)
+
+        async def _load(table: str, rows: list[dict]) -> None:
+            async def _write(chunk: list[dict]) -> None:
+                await self.backend.upsert(table, chunk)
+
+            async def _chunk(chunk: list[dict]) -> None:
+                key = chunk_key(table, chunk)
+                if checkpoint is not None and key in checkpoint:
+                    stats["skipped_chunks"] += 1
+                    return
+                async with parallel:
+                    try:
+                        stats["retries"] += await retry_chunk(
+                            _write, chunk, settings.DB_BULK_RETRIES, settings.DB_BULK_RETRY_DELAY
+                        )
+                    except Exception as e:
+                        stats["failed_chunks"] += 1
+                        print(f"❌ Chunk de {len(chunk)} filas en {table} falló tras reintentos: {e}")
+                        return
+                stats["chunks"] += 1
+                stats["bytes_sent"] += _json_size(chunk)
+                if checkpoint is not None:
+                    checkpoint.mark(key)
+
+            chunks = iter_chunks(rows, settings.DB_BULK_CHUNK_ROWS, settings.DB_BULK_CHUNK_BYTES)
+            await asyncio.gather(*(_chunk(chunk) for chunk in chunks))
+
+        # Competiciones primero: los partidos las referencian
+        await _load("competitions", list(competition_rows.values()))
+        await _load("matches", list(match_rows.values()))
+        return stats
+
+    async def _upsert_in_batches(
+        self,
+        table: str,
+        rows: list[dict],
+        batch_size: int,
+        stats: dict,
+        on_written: Optional[Callable[[list[dict]], None]] = None,
+    ) -> None:
+        async def _batch(batch: list[dict]) -> None:
+            await self.backend.upsert(table, batch)
+            stats["round_trips"] += 1
+            stats["bytes_sent"] += _json_size(batch)
+            if on_written:
+                on_written(batch)
+
+        # Los lotes de una misma tabla van en paralelo (acotados por DB_MAX_CONCURRENCY)
+        await asyncio.gather(*(_batch(rows[start:start + batch_size]) for start in range(0, len(rows), batch_size)))
+
+    async def upsert_rows(self, table: str, rows: list[dict], batch_size: Optional[int] = None) -> dict:
+        """Upsert en bloques de como mucho batch_size filas (DB_UPSERT_BATCH_SIZE). Devuelve round trips y bytes."""
+        stats = {"round_trips": 0, "bytes_sent": 0}
+        await self._upsert_in_batches(table, rows, batch_size or settings.DB_UPSERT_BATCH_SIZE, stats)
+        return stats
+
+    async def compare_and_set_rows(
+        self,
+        table: str,
+        rows: list[dict],
+        columns: tuple[str, ...],
+        batch_size: Optional[int] = None,
+    ) -> tuple[set, dict]:
+        """
+        backend.compare_and_set en bloques de como mucho batch_size filas
+        (DB_UPSERT_BATCH_SIZE). Devuelve los ids escritos, round trips y bytes.
+        """
+        batch_size = batch_size or settings.DB_UPSERT_BATCH_SIZE
+        stats = {"round_trips": 0, "bytes_sent": 0}
+        written: set = set()
+
+        async def _batch(batch: list[dict]) -> None:
+            written.update(await self.backend.compare_and_set(table, batch, columns))
+            stats["round_trips"] += 1
+            stats["bytes_sent"] += _json_size(batch)
+
+        await asyncio.gather(*(_batch(rows[start:start + batch_size]) for start in range(0, len(rows), batch_size)))
+        return written, stats
+
+    async def save_standings(self, league_id: int, standings_data: list):
+        """Encola la clasificación; se escribe en diferido con el resto de ligas."""
         if not standings_data:
             return
-            
-        self.supabase.table("competitions").update({
-            "standings": standings_data,
-            "updated_at": "now()"
-        }).eq("id", league_id).execute() 
+        self.standings_buffer.put(league_id, standings_data)
 
-    def save_match_events(self, match_id: int, events_data: list):
+    async def save_match_events(self, match_id: int, events_data: list):
+        """Encola los eventos del partido; si cambian antes del flush, solo se escriben los últimos."""
         if not events_data:
             return
+        self.events_buffer.put(match_id, events_data)
 
-        self.supabase.table("matches").update({
-            "events": events_data,
-            "updated_at": "now()" # Descomenta si creaste esta columna
-        }).eq("id", match_id).execute()   
+    async def _flush_match_events(self, items: dict[int, list]) -> None:
+        # Solo events/updated_at: reenviar estado, marcador o minuto de una fila
+        # cacheada podría pisar lo que save_matches acaba de escribir
+        await self._flush_column("matches", "events", items)
 
-    def calculate_predictions_score(self, match_id: int, home_goals: int, away_goals: int):
+    async def _flush_standings(self, items: dict[int, list]) -> None:
+        # Igual que los eventos: solo standings/updated_at, nunca la fila cacheada
+        await self._flush_column("competitions", "standings", items)
+
+    async def _flush_column(self, table: str, column: str, items: dict[int, Any]) -> None:
+        """Una columna de muchas filas por id, en bloques de DB_UPSERT_BATCH_SIZE filas."""
+        ids = list(items)
+        batch_size = settings.DB_UPSERT_BATCH_SIZE
+        await asyncio.gather(*(
+            self.backend.update_column(table, column, {row_id: items[row_id] for row_id in ids[start:start + batch_size]})
+            for start in range(0, len(ids), batch_size)
+        ))
+
+    async def calculate_predictions_score(self, match_id: int, home_goals: int, away_goals: int):
         """
-        Calcula los puntos para TODAS las predicciones de un partido terminado.
-        Al ser solo usuarios logueados, actualizamos sus registros directamente.
-        
-        Sistema de Puntuación:
+        Recalcula los puntos de TODAS las predicciones de un partido terminado
+        (también las ya puntuadas), con las mismas reglas y estados
+        (exact/win/lose) que la liquidación del worker.
+
+        Sistema de Puntuación (por defecto, configurable en SCORING_RULES):
         - 3 Puntos: Marcador Exacto (Pleno).
         - 1 Punto:  Signo Correcto (Ganador/Empate) pero marcador incorrecto.
         - 0 Puntos: Fallo total.
         """
-        print(f"🧮 Calculando quiniela para partido {match_id} (Resultado: {home_goals}-{away_goals})...")
-        
-        # 1. Buscamos todas las predicciones de este partido
-        response = self.supabase.table("predictions").select("*").eq("match_id", match_id).execute()
-        predictions = response.data
-        
-        if not predictions:
-            print(f"   -> No hay predicciones registradas para el partido {match_id}.")
-            return
+        # Import local: PointsService depende de DatabaseService
+        from app.services.points import PointsService
 
-        updates = []
-
-        real_sign = "1" if home_goals > away_goals else ("2" if away_goals > home_goals else "X")
-
-
-        # 3. Evaluamos cada predicción usuario por usuario
-        for pred in predictions:
-            p_home, p_away = int(pred["home_score"]), int(pred["away_score"])
-            points = 0
-            status = "lose"
-
-           
-
-            # --- CASO A: PLENO (Marcador Exacto) ---
-            if p_home == home_goals and p_away == away_goals:
-                points = 3
-                status = "hit"  # Verde
-            
-            # --- CASO B: ACIERTO DE SIGNO (Ganador/Empate) ---
-            else:
-               pred_sign = "1" if p_home > p_away else ("2" if p_away > p_home else "X")
-               if pred_sign == real_sign:
-                    points = 1
-                    status = "partial" # SIGNO
-
-            # Preparamos el objeto para actualizar
-            updates.append({
-                "id": pred["id"],
-                "points": points,
-                "status": status,
-                "updated_at": "now()"
-            })
-
-        # 4. Guardamos los cambios en lote (Upsert)
-        if updates:
-            # Upsert actualiza basándose en el ID
-            self.supabase.table("predictions").upsert(updates).execute()
-            print(f"✅ Puntos repartidos a {len(updates)} usuarios en el partido {match_id}.")
+        print(f"🧮 Calculando quiniela para partido {match_id} (Resultado: {home_goals}-{away_goals})...")
+        return await PointsService(self).calculate_many_match_points(
+            {match_id: (home_goals, away_goals)}, rescore=True
+        )
@@ -0,0 +1,123 @@
+import json
+import re
+from typing import Iterable, Optional
+
+import numpy as np
+
+_PRIMARY_ID_RE = re.compile(rb'"primaryId"\s*:\s*(-?\d+)')
+_LEAGUES_KEY_RE = re.compile(rb'"leagues"\s*:\s*\[')
+
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_OPEN_OBJ, _OPEN_ARR = ord("{"), ord("[")
+_CLOSE_OBJ, _CLOSE_ARR = ord("}"), ord("]")
+
+# Tabla byte -> +1 (abre), -1 (cierra) o 0, para clasificar todo el buffer de una pasada
+_BRACKET_DELTA = np.zeros(256, dtype=np.int8)
+_BRACKET_DELTA[[_OPEN_OBJ, _OPEN_ARR]] = 1
+_BRACKET_DELTA[[_CLOSE_OBJ, _CLOSE_ARR]] = -1
+
+
+def _real_quotes(buf: np.ndarray) -> np.ndarray:
+    """Posiciones de comillas que delimitan strings (descarta las escapadas \\")."""
+    quotes = np.flatnonzero(buf == _QUOTE)
+    if len(quotes) == 0 or not (buf == _BACKSLASH).any():
+        return quotes
+
+    # Caso raro: hay barras invertidas. Una comilla está escapada si la precede
+    # un número impar de barras seguidas.
+    keep = np.ones(len(quotes), dtype=bool)
+    for i in np.flatnonzero(buf[np.maximum(quotes - 1, 0)] == _BACKSLASH):
+        pos = int(quotes[i]) - 1
+        run = 0
+        while pos >= 0 and buf[pos] == _BACKSLASH:
+            run += 1
+            pos -= 1
+        keep[i] = run % 2 == 0
+    return quotes[keep]
+
+
+class _StructuralIndex:
+    """
+    Índice estructural del documento (al estilo de la fase 1 de simdjson):
+    posiciones de {}[] fuera de strings y la profundidad tras cada una,
+    calculadas de forma vectorizada sobre los bytes crudos.
+    """
+
+    def __init__(self, body: bytes) -> None:
+        self.buf = np.frombuffer(body, dtype=np.uint8)
+        quotes = _real_quotes(self.buf)
+
+        delta = _BRACKET_DELTA[self.buf]
+        positions = np.flatnonzero(delta)
+
+        # Un carácter está dentro de un string si le preceden un número impar de comillas
+        positions = positions[np.searchsorted(quotes, positions) % 2 == 0]
+
+        self.positions = positions
+        self.depth_after = np.cumsum(delta[positions], dtype=np.int32)
+
+    def depth_at(self, pos: int) -> int:
+        k = int(np.searchsorted(self.positions, pos))
+        return int(self.depth_after[k - 1]) if k else 0
+
+    def league_spans(self, body: bytes) -> Optional[list[tuple[int, int]]]:
+        """Rangos [inicio, fin) de cada objeto del array raíz "leagues"."""
+        if len(self.positions) == 0 or self.depth_after[-1] != 0:
+            return None
+
+        key = _LEAGUES_KEY_RE.search(body)
+        while key and self.depth_at(key.start()) != 1:
+            key = _LEAGUES_KEY_RE.search(body, key.end())
+        if key is None:
+            return None
+
+        # Índice del '[' del array de ligas y del ']' que lo cierra (vuelta a profundidad 1)
+        open_k = int(np.searchsorted(self.positions, key.end() - 1))
+        closing = np.flatnonzero(self.depth_after[open_k + 1:] == 1)
+        if len(closing) == 0:
+            return None
+        close_k = open_k + 1 + int(closing[0])
+
+        win_pos = self.positions[open_k + 1:close_k]
+        win_depth = self.depth_after[open_k + 1:close_k]
+        win_chars = self.buf[win_pos]
+
+        # Cada liga es un '{' que abre a profundidad 3 y un '}' que vuelve a 2
+        starts = win_pos[(win_depth == 3) & (win_chars == _OPEN_OBJ)]
+        ends = win_pos[(win_depth == 2) & (win_chars == _CLOSE_OBJ)]
+        if len(starts) != len(ends):
+            return None
+        return list(zip(starts.tolist(), (ends + 1).tolist()))
+
+
+def decode_target_leagues(body: bytes, target_ids: Iterable[int]) -> list[dict]:
+    """
+    Decodifica del feed `matches?date=` solo las ligas cuyo primaryId está en
+    target_ids. El resto del documento (cientos de ligas) nunca se convierte
+    en objetos Python: los límites de cada liga salen de un índice
+    estructural vectorizado y su primaryId se lee directamente de los bytes.
+
+    Si el documento no tiene la forma esperada se cae al decode completo.
+    """
+    targets = set(target_ids)
+    index = _StructuralIndex(body)
+    spans = index.league_spans(body)
+    if spans is None:
+        return _decode_all(body, targets)
+
+    leagues = []
+    for start, end in spans:
+        match = _PRIMARY_ID_RE.search(body, start, end)
+        # El primaryId debe ser clave de la propia liga, no de un objeto anidado
+        while match and index.depth_at(match.start()) != 3:
+            match = _PRIMARY_ID_RE.search(body, match.end(), end)
+        if match is None or int(match.group(1)) not in targets:
+            continue
+        leagues.append(json.loads(body[start:end]))
+    return leagues
+
+
+def _decode_all(body: bytes, targets: set[int]) -> list[dict]:
+    data = json.loads(body)
+    return [league for league in data.get("leagues") or [] if league.get("primaryId") in targets]
@@ -0,0 +1,143 @@
+import time
+from collections import defaultdict
+from typing import Any, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.archive import RecordingTransport, ReplayTransport, ResponseArchive
+
+FOTMOB_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+# Traducción de los eventos de traza de httpcore ("connection.connect_tcp",
+# "http2.receive_response_headers"...) a las fases que queremos medir.
+_TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "start_tls": "tls",
+    "send_connection_init": "send",
+    "send_request_headers": "send",
+    "send_request_body": "send",
+    "receive_response_headers": "wait",
+    "receive_response_body": "receive",
+}
+
+LATENCY_PHASES = ("connect", "tls", "send", "wait", "receive")
+
+# Feed diario: al reproducir, otra fecha se sirve con lo grabado (el resto, solo URL exacta)
+MATCHES_FEED_PATH = "/api/data/matches"
+
+
+def build_fotmob_transport() -> httpx.AsyncBaseTransport:
+    """
+    Transporte de red con pool keep-alive y HTTP/2, envuelto según
+    FOTMOB_ARCHIVE_MODE para grabar respuestas o reproducirlas sin red.
+    """
+    mode = settings.FOTMOB_ARCHIVE_MODE
+    if mode == "replay":
+        return ReplayTransport(
+            ResponseArchive(settings.FOTMOB_ARCHIVE_DIR), path_fallback=True, fallback_paths=(MATCHES_FEED_PATH,)
+        )
+
+    limits = httpx.Limits(
+        max_connections=settings.FOTMOB_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.FOTMOB_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.FOTMOB_KEEPALIVE_EXPIRY,
+    )
+    network = httpx.AsyncHTTPTransport(http2=settings.FOTMOB_HTTP2, limits=limits)
+    if mode == "record":
+        return RecordingTransport(network, ResponseArchive(settings.FOTMOB_ARCHIVE_DIR))
+    return network
+
+
+def build_fotmob_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Crea el cliente HTTP de larga vida para FotMob: pool de conexiones
+    keep-alive, timeouts y HTTP/2 configurables desde settings.
+    """
+    timeout = httpx.Timeout(
+        settings.FOTMOB_READ_TIMEOUT,
+        connect=settings.FOTMOB_CONNECT_TIMEOUT,
+        pool=settings.FOTMOB_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(
+        headers=FOTMOB_HEADERS,
+        timeout=timeout,
+        transport=transport or build_fotmob_transport(),
+    )
+
+
+class RequestTiming:
+    """
+    Desglose de latencia de una petición (connect, tls, send, wait, receive)
+    construido a partir de la extensión 'trace' de httpx/httpcore.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = dict.fromkeys(LATENCY_PHASES, 0.0)
+        self.new_connection = False
+        self.total = 0.0
+        self._started: dict[str, float] = {}
+        self._t0 = time.perf_counter()
+
+    async def trace(self, event_name: str, info: dict[str, Any]) -> None:
+        name, _, state = event_name.rpartition(".")
+        step = name.rsplit(".", 1)[-1]
+        phase = _TRACE_PHASES.get(step)
+        if phase is None:
+            return
+
+        now = time.perf_counter()
+        if state == "started":
+            self._started[step] = now
+            if phase == "connect":
+                self.new_connection = True
+        elif state in ("complete", "failed"):
+            started = self._started.pop(step, None)
+            if started is not None:
+                self.phases[phase] += now - started
+
+    def finish(self) -> None:
+        self.total = time.perf_counter() - self._t0
+
+
+class LatencyRecorder:
+    """Agrega los RequestTiming por endpoint (path) para poder reportarlos por ciclo."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, dict[str, float]] = defaultdict(self._empty)
+
+    @staticmethod
+    def _empty() -> dict[str, float]:
+        stats = {"requests": 0, "new_connections": 0, "total": 0.0, "max_total": 0.0}
+        stats.update(dict.fromkeys(LATENCY_PHASES, 0.0))
+        return stats
+
+    def record(self, endpoint: str, timing: RequestTiming) -> None:
+        stats = self._stats[endpoint]
+        stats["requests"] += 1
+        stats["new_connections"] += int(timing.new_connection)
+        stats["total"] += timing.total
+        stats["max_total"] = max(stats["max_total"], timing.total)
+        for phase, seconds in timing.phases.items():
+            stats[phase] += seconds
+
+    def snapshot(self, reset: bool = False) -> dict[str, dict[str, float]]:
+        """
+        Devuelve, por endpoint, número de peticiones, conexiones nuevas y la
+        media en milisegundos de cada fase.
+        """
+        summary = {}
+        for endpoint, stats in self._stats.items():
+            count = stats["requests"] or 1
+            summary[endpoint] = {
+                "requests": stats["requests"],
+                "new_connections": stats["new_connections"],
+                "avg_total_ms": round(stats["total"] / count * 1000, 2),
+                "max_total_ms": round(stats["max_total"] * 1000, 2),
+                **{f"avg_{phase}_ms": round(stats[phase] / count * 1000, 2) for phase in LATENCY_PHASES},
+            }
+        if reset:
+            self._stats.clear()
+        return summary
@@ -0,0 +1,115 @@
+"""
+Interning de equipos y competiciones entre ciclos de scraping.
+
+Los mismos pocos cientos de equipos aparecen en cada ciclo. En vez de crear
+un TeamInfo nuevo (y su model_dump() al guardar) por partido, se reutiliza
+una instancia inmutable (TeamInfo es frozen) por equipo junto con su dict ya
+serializado, expuesto como mapping de solo lectura. Cada
+entrada lleva una firma con los campos que pueden cambiar (nombre, logo...):
+si FotMob devuelve algo distinto se reemplaza la entrada.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Hashable, Mapping, Optional
+
+from app.schemas.match import TeamInfo
+
+TEAM_INTERN_MAX_ENTRIES = 4096
+COMPETITION_INTERN_MAX_ENTRIES = 512
+
+
+@dataclass(frozen=True, slots=True)
+class Interned:
+    signature: tuple
+    value: Any
+    # Representación ya serializada para la DB, de solo lectura: se comparte
+    payload: Mapping[str, Any]
+
+
+class InternTable:
+    """LRU acotado de objetos inmutables, invalidados cuando cambia su firma."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Interned] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, signature: tuple, factory: Callable[[], tuple[Any, dict]]) -> Interned:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.signature == signature:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry
+            self.invalidations += 1
+        else:
+            self.misses += 1
+
+        value, payload = factory()
+        entry = Interned(signature, value, MappingProxyType(payload))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def peek(self, key: Hashable) -> Optional[Interned]:
+        return self._entries.get(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+# El país de TeamInfo es el de la competición, así que un mismo club puede
+# tener una variante por país (liga doméstica y torneo internacional).
+TEAMS = InternTable(TEAM_INTERN_MAX_ENTRIES)
+COMPETITIONS = InternTable(COMPETITION_INTERN_MAX_ENTRIES)
+
+
+def intern_team(team_id: int, name: str, img: str, country: str) -> TeamInfo:
+    def factory() -> tuple[TeamInfo, dict]:
+        team = TeamInfo(
+            id=team_id,
+            name=name,
+            abbr=name[:3].upper(), # FotMob no da abbr corto, lo generamos
+            img=img,
+            country=country,
+        )
+        return team, team.model_dump()
+
+    return TEAMS.get((team_id, country), (name, img), factory).value
+
+
+def team_payload(team: TeamInfo) -> Mapping[str, Any]:
+    """
+    model_dump() del equipo, reutilizando el ya serializado si está internado
+    (entonces es de solo lectura: copiarlo antes de modificarlo o serializarlo).
+    """
+    entry = TEAMS.peek((team.id, team.country))
+    if entry is not None and entry.value is team:
+        return entry.payload
+    return team.model_dump()
+
+
+def competition_row(league_id: int, name: str, badge: str, sport_id: int) -> dict:
+    """Fila de la tabla competitions, internada por id de liga (copia propia del llamante)."""
+    def factory() -> tuple[None, dict]:
+        return None, {"id": league_id, "name": name, "badge": badge, "sport_id": sport_id}
+
+    return dict(COMPETITIONS.get(league_id, (name, badge, sport_id), factory).payload)
+
+
+def metrics() -> dict[str, Any]:
+    return {"teams": TEAMS.metrics(), "competitions": COMPETITIONS.metrics()}
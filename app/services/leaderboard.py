@@ -0,0 +1,219 @@
+"""
+Clasificación de usuarios mantenida de forma incremental.
+
+La tabla leaderboard guarda totales acumulados por usuario en tres ámbitos:
+global, por competición y por ronda de una competición. La liquidación no
+vuelve a sumar predictions.points: tras escribir cada página aplica solo las
+diferencias que acaba de producir (puntos nuevos menos los que hubiera,
+predicciones puntuadas por primera vez, plenos ganados o perdidos), así que
+leer una clasificación cuesta lo mismo que las filas que se muestran.
+
+Las diferencias se suman en la propia DB (INSERT ... ON CONFLICT DO UPDATE
+SET points = leaderboard.points + excluded.points, ...), sin leer antes los
+totales, así que aplicar diferencias concurrentes no pierde sumas. Para no
+duplicarlas, la liquidación (app/services/points.py) escribe cada predicción
+condicionada a los puntos y estado que leyó y solo aplica las diferencias de
+las filas que escribió de verdad: si dos workers liquidan el mismo partido a
+la vez, cada predicción cuenta una vez. rebuild() sobreescribe los totales y
+va aparte (ver su docstring).
+
+Esquema (en Supabase y en la réplica SQLite de app/services/storage.py):
+
+    leaderboard(id text primary key, user_id text, scope text,
+                competition_id int8, round text, points int, predictions int,
+                exact int, updated_at timestamptz)
+
+En Supabase, el incremento es la función RPC leaderboard_increment:
+
+    create or replace function leaderboard_increment(rows jsonb) returns void
+    language sql as $$
+      insert into leaderboard as l
+        (id, user_id, scope, competition_id, round, points, predictions, exact, updated_at)
+      select id, user_id, scope, competition_id, round, points, predictions, exact, now()
+      from jsonb_to_recordset(rows) as r(id text, user_id text, scope text, competition_id int8,
+                                         round text, points int, predictions int, exact int)
+      on conflict (id) do update set
+        points = l.points + excluded.points,
+        predictions = l.predictions + excluded.predictions,
+        exact = l.exact + excluded.exact,
+        updated_at = excluded.updated_at;
+    $$;
+
+Si los totales se desincronizan (p. ej. se cayó el proceso entre escribir
+predicciones y aplicar sus diferencias) o para arrancar con datos previos,
+rebuild() los recalcula desde predictions.
+"""
+import asyncio
+import logging
+from typing import Any, Iterable, Optional
+
+from app.core.config import settings
+from app.services.database import DatabaseService
+from app.services.scoring import STATUS_EXACT
+
+logger = logging.getLogger("Leaderboard")
+
+LEADERBOARD_TABLE = "leaderboard"
+SCOPE_GLOBAL = "global"
+SCOPE_COMPETITION = "competition"
+SCOPE_ROUND = "round"
+
+# Columnas que se suman (no se sobreescriben) al aplicar diferencias
+COUNTER_COLUMNS = ("points", "predictions", "exact")
+
+
+def leaderboard_id(user_id: str, scope: str, competition_id: Optional[int] = None, round_name: Optional[str] = None) -> str:
+    return f"{scope}:{competition_id if competition_id is not None else ''}:{round_name or ''}:{user_id}"
+
+
+def _scope_key(competition_id: Optional[int], round_name: Optional[str]) -> tuple[str, Optional[int], Optional[str]]:
+    if competition_id is None:
+        return SCOPE_GLOBAL, None, None
+    if round_name is None:
+        return SCOPE_COMPETITION, competition_id, None
+    return SCOPE_ROUND, competition_id, round_name
+
+
+def accumulate_deltas(
+    deltas: dict[str, dict],
+    predictions: list[dict],
+    points: list[int],
+    statuses: list[str],
+    matches: dict[int, tuple[Optional[int], Optional[str]]],
+) -> dict[str, dict]:
+    """
+    Suma a deltas (por id de leaderboard) las diferencias de una página
+    puntuada. predictions trae los puntos y estado anteriores de cada fila
+    (None si no estaba puntuada); matches da (competition_id, round) por
+    partido.
+    """
+    for pred, new_points, new_status in zip(predictions, points, statuses):
+        old_points = pred.get("points")
+        d_points = new_points - (old_points or 0)
+        d_predictions = 1 if old_points is None else 0
+        d_exact = (new_status == STATUS_EXACT) - (pred.get("status") == STATUS_EXACT)
+        if not (d_points or d_predictions or d_exact):
+            continue
+
+        competition_id, round_name = matches.get(pred["match_id"], (None, None))
+        scopes = [(None, None)]
+        if competition_id is not None:
+            scopes.append((competition_id, None))
+            if round_name is not None:
+                scopes.append((competition_id, round_name))
+
+        for scope_competition, scope_round in scopes:
+            scope, competition, round_key = _scope_key(scope_competition, scope_round)
+            row_id = leaderboard_id(pred["user_id"], scope, competition, round_key)
+            delta = deltas.get(row_id)
+            if delta is None:
+                delta = deltas[row_id] = {
+                    "id": row_id,
+                    "user_id": pred["user_id"],
+                    "scope": scope,
+                    "competition_id": competition,
+                    "round": round_key,
+                    "points": 0,
+                    "predictions": 0,
+                    "exact": 0,
+                }
+            delta["points"] += d_points
+            delta["predictions"] += d_predictions
+            delta["exact"] += d_exact
+    return deltas
+
+
+class LeaderboardService:
+    def __init__(self, db: DatabaseService) -> None:
+        self.db = db
+
+        self.applied_rows = 0
+        self.applies = 0
+
+    async def apply(self, deltas: dict[str, dict]) -> int:
+        """
+        Suma las diferencias a los totales guardados, en la DB y sin leerlos
+        antes, en bloques de DB_UPSERT_BATCH_SIZE. Devuelve las filas escritas.
+        """
+        if not deltas:
+            return 0
+        rows = [{**delta, "updated_at": "now()"} for delta in deltas.values()]
+        batch_size = settings.DB_UPSERT_BATCH_SIZE
+        await asyncio.gather(*(
+            self.db.backend.increment(LEADERBOARD_TABLE, rows[start:start + batch_size], COUNTER_COLUMNS)
+            for start in range(0, len(rows), batch_size)
+        ))
+
+        self.applies += 1
+        self.applied_rows += len(rows)
+        return len(rows)
+
+    async def top(
+        self,
+        competition_id: Optional[int] = None,
+        round_name: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        """Los limit primeros de un ámbito (global, competición o ronda), por puntos."""
+        scope, competition, round_key = _scope_key(competition_id, round_name)
+        eq: dict[str, Any] = {"scope": scope}
+        if competition is not None:
+            eq["competition_id"] = competition
+        if round_key is not None:
+            eq["round"] = round_key
+        return await self.db.backend.select(
+            LEADERBOARD_TABLE,
+            "user_id,competition_id,round,points,predictions,exact",
+            eq=eq,
+            order_by="points",
+            descending=True,
+            limit=limit,
+        )
+
+    async def match_scopes(self, match_ids: Iterable[int]) -> dict[int, tuple[Optional[int], Optional[str]]]:
+        """(competition_id, round) de cada partido, para repartir las diferencias por ámbito."""
+        match_ids = list(match_ids)
+        chunk = settings.SETTLEMENT_MATCH_CHUNK
+        pages = await asyncio.gather(*(
+            self.db.backend.select("matches", "id,competition_id,round", in_={"id": match_ids[start:start + chunk]})
+            for start in range(0, len(match_ids), chunk)
+        ))
+        return {match["id"]: (match["competition_id"], match["round"]) for page in pages for match in page}
+
+    async def rebuild(self, page_size: Optional[int] = None) -> dict:
+        """
+        Recalcula todos los totales desde predictions (solo las puntuadas),
+        recorriéndola por páginas, y los sobreescribe. Los totales de ámbitos
+        que ya no tengan predicciones puntuadas no se tocan. Lanzarlo con la
+        liquidación parada: una diferencia aplicada entre la lectura y la
+        escritura se perdería.
+        """
+        page_size = page_size or settings.SETTLEMENT_PAGE_SIZE
+        totals: dict[str, dict] = {}
+        scanned = 0
+        matches: dict[int, tuple[Optional[int], Optional[str]]] = {}
+
+        async for page in self.db.backend.iter_pages(
+            "predictions", "id,user_id,match_id,points,status", page_size
+        ):
+            scanned += len(page)
+            scored = [pred for pred in page if pred["points"] is not None]
+            missing = {pred["match_id"] for pred in scored} - matches.keys()
+            if missing:
+                matches.update(await self.match_scopes(missing))
+            # Como si cada predicción se puntuara desde cero
+            accumulate_deltas(
+                totals,
+                [{**pred, "points": None, "status": None} for pred in scored],
+                [pred["points"] for pred in scored],
+                [pred["status"] for pred in scored],
+                matches,
+            )
+
+        rows = [{**row, "updated_at": "now()"} for row in totals.values()]
+        await self.db.upsert_rows(LEADERBOARD_TABLE, rows)
+        logger.info("Leaderboard rebuilt: %s predictions scanned, %s totals written", scanned, len(rows))
+        return {"predictions": scanned, "totals": len(rows)}
+
+    def metrics(self) -> dict[str, Any]:
+        return {"applies": self.applies, "applied_rows": self.applied_rows}
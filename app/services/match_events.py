@@ -0,0 +1,83 @@
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.services.scraper import ScraperService
+
+# Partidos cuya huella recordamos; sobra para una jornada completa
+EVENT_TRACKER_MAX_MATCHES = 2048
+
+Fingerprint = tuple[int, bytes]
+
+
+def event_fingerprint(raw_events: list) -> Fingerprint:
+    """Huella compacta del stream de eventos: número de eventos + hash del último."""
+    if not raw_events:
+        return 0, b""
+    last = json.dumps(raw_events[-1], sort_keys=True, separators=(",", ":")).encode()
+    return len(raw_events), hashlib.blake2b(last, digest_size=16).digest()
+
+
+@dataclass(slots=True)
+class EventUpdate:
+    match_id: int
+    events: list
+    fingerprint: Fingerprint
+
+
+class MatchEventTracker:
+    """
+    Ingesta incremental de eventos de partido. Guarda por partido la huella
+    del último stream persistido y solo parsea y devuelve eventos cuando ha
+    cambiado (gol, tarjeta, cambio...). El llamante encola los eventos
+    (save_match_events solo los pasa al write-behind, que reintenta sus
+    propios fallos) y confirma con mark_written(). Si la descarga de los
+    eventos falla, la huella no cambia y el siguiente ciclo lo reintenta.
+    """
+
+    def __init__(self, scraper: ScraperService, max_matches: int = EVENT_TRACKER_MAX_MATCHES) -> None:
+        self.scraper = scraper
+        self.max_matches = max_matches
+        self._fingerprints: OrderedDict[int, Fingerprint] = OrderedDict()
+
+        self.skipped = 0
+        self.written = 0
+        self.failed = 0
+
+    async def poll(self, match_id: int) -> Optional[EventUpdate]:
+        """Devuelve los eventos parseados si cambiaron desde el último guardado, si no None."""
+        raw_events = await self.scraper.fetch_raw_match_events(match_id)
+        if raw_events is None:
+            self.failed += 1
+            return None
+
+        fingerprint = event_fingerprint(raw_events)
+        previous = self._fingerprints.get(match_id)
+        if previous is not None:
+            self._fingerprints.move_to_end(match_id)
+        # Sin eventos no hay nada que guardar (igual que antes)
+        if fingerprint == previous or not raw_events:
+            self.skipped += 1
+            return None
+
+        return EventUpdate(match_id, self.scraper.parse_match_events(raw_events), fingerprint)
+
+    def mark_written(self, update: EventUpdate) -> None:
+        self.written += 1
+        self._fingerprints[update.match_id] = update.fingerprint
+        self._fingerprints.move_to_end(update.match_id)
+        while len(self._fingerprints) > self.max_matches:
+            self._fingerprints.popitem(last=False)
+
+    def metrics(self, reset: bool = False) -> dict[str, Any]:
+        summary = {
+            "skipped": self.skipped,
+            "written": self.written,
+            "failed": self.failed,
+            "tracked_matches": len(self._fingerprints),
+        }
+        if reset:
+            self.skipped = self.written = self.failed = 0
+        return summary
@@ -0,0 +1,178 @@
+"""
+Normalizador único de partidos de FotMob.
+
+Convierte el dict crudo de un partido (feed diario `matches?date=` o
+calendario de `leagues?id=`) en la representación interna en una sola
+pasada. Todo lo que depende solo de la liga (id, país, escudo, reglas del
+feed) se precalcula una vez en LeagueContext y no por partido.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, List, Optional
+
+from pydantic import TypeAdapter
+
+from app.schemas.match import CompetitionData, MatchData, MatchStatus, TeamInfo
+from app.services.interning import intern_team
+
+TEAM_LOGO_URL = "https://images.fotmob.com/image_resources/logo/teamlogo/{}.png"
+LEAGUE_LOGO_URL = "https://images.fotmob.com/image_resources/logo/leaguelogo/{}.png"
+
+# Tabla de estados: el primer flag a True del objeto 'status' de FotMob manda
+STATUS_RULES = (
+    ("cancelled", MatchStatus.CANC),
+    ("finished", MatchStatus.FT),
+    ("started", MatchStatus.LIVE),
+)
+
+# Los partidos se acumulan como dicts y se validan en bloque: una sola llamada
+# al validador de pydantic-core por liga en vez de 3 modelos por partido.
+MATCH_LIST_ADAPTER = TypeAdapter(List[MatchData])
+
+
+@dataclass(frozen=True, slots=True)
+class LeagueContext:
+    """Constantes de una liga, calculadas una vez y compartidas por todos sus partidos."""
+    id: int
+    name: str
+    country: str
+    badge: str
+    # Feed diario: minuto en vivo, kickoff de respaldo 'time' y marcador de respaldo "h-a".
+    # Calendario de temporada: sin minuto, kickoff "" y resultado "vs".
+    live_feed: bool
+
+
+@lru_cache(maxsize=512)
+def league_context(league_id: int, name: str, country: str, live_feed: bool) -> LeagueContext:
+    return LeagueContext(
+        id=league_id,
+        name=name,
+        country=country,
+        badge=LEAGUE_LOGO_URL.format(league_id),
+        live_feed=live_feed,
+    )
+
+
+@lru_cache(maxsize=8192)
+def team_logo_url(team_id: Any) -> str:
+    return TEAM_LOGO_URL.format(team_id)
+
+
+@lru_cache(maxsize=8192)
+def format_kickoff(utc_time: str) -> Optional[str]:
+    """'2026-01-31T20:00:00Z' -> '20:00 31/01/2026' (formato del frontend). Muchos partidos comparten hora."""
+    try:
+        # Parseamos ISO format (quitamos la Z para compatibilidad simple)
+        dt = datetime.fromisoformat(utc_time.replace("Z", "+00:00"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return dt.strftime("%H:%M %d/%m/%Y")
+
+
+def match_status(status_obj: dict) -> MatchStatus:
+    for flag, status in STATUS_RULES:
+        if status_obj.get(flag):
+            return status
+    return MatchStatus.NS # Por defecto Not Started
+
+
+def normalize_status(status_raw: Any) -> str:
+    """
+    Normaliza a string simple ('FT', 'NS', 'Canc.'...) cualquier forma de
+    status: Enum MatchStatus, objeto/dict crudo con 'short' o string.
+    """
+    # Caso 1: Es un Enum (MatchStatus.FT), accedemos a su valor real
+    if hasattr(status_raw, "value"):
+        return str(status_raw.value)
+    # Caso 2: Objeto con propiedad short (ej. objeto raw de FotMob)
+    if hasattr(status_raw, "short"):
+        return str(status_raw.short)
+    # Caso 3: Diccionario
+    if isinstance(status_raw, dict):
+        return str(status_raw.get("short", "NS"))
+    # Caso 4: String directo (limpiando "MatchStatus." si aparece) o fallback
+    return str(status_raw).removeprefix("MatchStatus.")
+
+
+def extract_round(match: dict) -> Optional[str]:
+    # Prioridad 1: Campo 'round' (Suele ser el código: "1/8", "playoff", "1")
+    if "round" in match:
+        val = match["round"]
+        if isinstance(val, str): return val
+        if isinstance(val, int): return str(val)
+        if isinstance(val, dict): return val.get("name") # Por si acaso viene anidado
+
+    # Prioridad 2: Campo 'roundName' (A veces es int: 1)
+    if "roundName" in match:
+        return str(match["roundName"])
+
+    return None
+
+
+def _team(team: dict, country: str) -> TeamInfo:
+    # Instancia compartida entre partidos y ciclos; pydantic no la revalida
+    team_id = team.get("id")
+    return intern_team(team_id, team.get("name"), team_logo_url(team_id), country)
+
+
+def normalize_match(match: dict, ctx: LeagueContext) -> dict:
+    """Partido crudo de FotMob -> dict con los campos de MatchData."""
+    status_obj = match.get("status", {})
+    status = match_status(status_obj)
+    home = match.get("home", {})
+    away = match.get("away", {})
+
+    utc_time = status_obj.get("utcTime")
+    kickoff = format_kickoff(utc_time) if utc_time else None
+
+    minute = None
+    if ctx.live_feed:
+        if kickoff is None:
+            kickoff = match.get("time", "") # Fallback
+        # Usamos 'scoreStr' ("0 - 0") o construimos manual si falla
+        result = status_obj.get("scoreStr", f"{home.get('score', 0)}-{away.get('score', 0)}")
+        if status is MatchStatus.LIVE:
+            live_time = status_obj.get("liveTime", {})
+            # FotMob suele poner el minuto en 'short' o 'timeStr'
+            if isinstance(live_time, dict):
+                minute = live_time.get("short") or live_time.get("long")
+    else:
+        if kickoff is None:
+            kickoff = ""
+        result = status_obj.get("scoreStr", "vs")
+
+    return {
+        "id": match["id"],
+        "status": status,
+        "result": result,
+        "kickoff": kickoff,
+        "kickoff_iso": utc_time,
+        "minute": minute,
+        "round": extract_round(match),
+        "homeId": home.get("id"),
+        "awayId": away.get("id"),
+        "competitionid": ctx.id,
+        "country": ctx.country,
+        "homeTeam": _team(home, ctx.country),
+        "awayTeam": _team(away, ctx.country),
+        "events": [], # Los eventos detallados (goles, tarjetas) requieren otra llamada
+    }
+
+
+def normalize_matches(matches: list[dict], ctx: LeagueContext) -> List[MatchData]:
+    """API por lotes: normaliza todos los partidos de una liga y los valida de una vez."""
+    return MATCH_LIST_ADAPTER.validate_python([normalize_match(match, ctx) for match in matches])
+
+
+def build_competition(matches: list[dict], ctx: LeagueContext) -> Optional[CompetitionData]:
+    """CompetitionData con los partidos normalizados, o None si la liga no trae partidos."""
+    if not matches:
+        return None
+    return CompetitionData(
+        id=str(ctx.id),
+        name=ctx.name,
+        fullName=ctx.name, # FotMob no distingue longName en la lista principal
+        badge=ctx.badge,
+        matches=normalize_matches(matches, ctx),
+    )
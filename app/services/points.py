@@ -1,67 +1,143 @@
+import asyncio
+from typing import Optional
+
+from app.core.config import settings
 from app.services.database import DatabaseService
+from app.services.leaderboard import LeaderboardService, accumulate_deltas
+from app.services.scoring import rules_for, score_many
+
+# Solo lo que necesita la puntuación, más los puntos y estado anteriores: son la
+# condición de la escritura y la base de las diferencias de la clasificación
+PREDICTION_COLUMNS = "id,user_id,match_id,home_score,away_score,points,status"
+SCORED_COLUMNS = ("points", "status")
 
 class PointsService:
-    def __init__(self):
-        self.db = DatabaseService()
+    def __init__(self, db: Optional[DatabaseService] = None):
+        # Compartir el DatabaseService del worker reutiliza su pool de conexiones
+        self.db = db or DatabaseService()
+        self.leaderboard = LeaderboardService(self.db)
 
     async def calculate_match_points(self, match_id: int, real_home: int, real_away: int):
         print(f"🧮 Calculando puntos para el partido {match_id} ({real_home}-{real_away})...")
-        
-        # 1. Obtener predicciones de este partido que NO tengan puntos
-        response = self.db.supabase.table("predictions")\
-            .select("*")\
-            .eq("match_id", match_id)\
-            .is_("points", "null")\
-            .execute()
-        
-        predictions = response.data
-        
-        if not predictions:
+        return await self.calculate_many_match_points({match_id: (real_home, real_away)})
+
+    async def calculate_many_match_points(
+        self,
+        results: dict[int, tuple[int, int]],
+        match_chunk: Optional[int] = None,
+        page_size: Optional[int] = None,
+        rescore: bool = False,
+    ) -> dict:
+        """
+        Liquida varios partidos terminados a la vez: results es
+        {match_id: (goles_local, goles_visitante)}.
+
+        Las predicciones sin puntuar se leen por grupos de match_chunk
+        partidos (SETTLEMENT_MATCH_CHUNK, un filtro in_("match_id", ...)) y,
+        dentro de cada grupo, en páginas de page_size filas
+        (SETTLEMENT_PAGE_SIZE) paginadas por id y con solo las columnas que
+        hacen falta. Cada página se puntúa en una pasada vectorizada y se
+        escribe antes de leer la siguiente, así que la memoria no crece con
+        el número de predicciones y no se pierde ninguna por el tope de filas
+        de PostgREST.
+
+        Las reglas de cada partido salen de su competición y ronda (ver
+        app/services/scoring.rules_for). Con rescore=True se vuelven a
+        puntuar también las predicciones que ya tenían puntos (p. ej. tras
+        corregir un resultado o cambiar las reglas).
+
+        Cada predicción se escribe solo si sigue con los puntos y estado
+        leídos (compare-and-set en la DB), y las diferencias de la
+        clasificación (ver app/services/leaderboard.py) salen solo de las
+        filas escritas: si otro proceso liquida el mismo partido a la vez,
+        cada predicción cuenta una única vez. Las que no cambian de puntos ni
+        estado no se reenvían.
+
+        Devuelve estadísticas: partidos, predicciones escritas, consultas,
+        round trips de escritura, bytes enviados y totales actualizados.
+        """
+        match_chunk = match_chunk or settings.SETTLEMENT_MATCH_CHUNK
+        page_size = page_size or settings.SETTLEMENT_PAGE_SIZE
+        match_ids = list(results)
+        stats = {
+            "matches": len(match_ids),
+            "predictions": 0,
+            "select_queries": 0,
+            "round_trips": 0,
+            "bytes_sent": 0,
+            "leaderboard_rows": 0,
+        }
+
+        async def _settle_chunk(chunk: list[int]) -> None:
+            matches: Optional[dict] = None
+            rules: dict = {}
+
+            # 1. Predicciones de estos partidos que NO tengan puntos, página a página
+            pages = self.db.backend.iter_pages(
+                "predictions",
+                PREDICTION_COLUMNS,
+                page_size,
+                is_null=[] if rescore else ["points"],
+                in_={"match_id": chunk},
+            )
+            async for predictions in pages:
+                stats["select_queries"] += 1
+                if matches is None:
+                    # Competición y ronda de cada partido (reglas y ámbitos de la
+                    # clasificación), solo si hay algo que puntuar: un partido ya
+                    # liquidado cuesta una única consulta
+                    matches = await self.leaderboard.match_scopes(chunk)
+                    rules = {match_id: rules_for(*scope) for match_id, scope in matches.items()}
+                    stats["select_queries"] += 1
+
+                # 2. Puntuar la página de una vez con las reglas compiladas de
+                #    cada partido (por defecto exacto 3, signo 1, fallo o vacío 0)
+                points, statuses = score_many(predictions, results, rules)
+
+                # 3. Guardar en bloque las que cambian, condicionadas a los
+                #    puntos y estado leídos (un update, no un upsert: no hace
+                #    falta reenviar user_id/match_id, NOT NULL, error 23502)
+                scored = [
+                    (pred, pred_points, status)
+                    for pred, pred_points, status in zip(predictions, points, statuses)
+                    if (pred_points, status) != (pred["points"], pred["status"])
+                ]
+                updates = [
+                    {
+                        "id": pred["id"],
+                        "points": pred_points,
+                        "status": status,
+                        "old_points": pred["points"],
+                        "old_status": pred["status"],
+                    }
+                    for pred, pred_points, status in scored
+                ]
+                written, write_stats = await self.db.compare_and_set_rows("predictions", updates, SCORED_COLUMNS)
+                stats["predictions"] += len(written)
+                stats["round_trips"] += write_stats["round_trips"]
+                stats["bytes_sent"] += write_stats["bytes_sent"]
+
+                # 4. Totales de la clasificación: solo las diferencias de lo que
+                #    esta página escribió de verdad (no lo que ganó otro proceso)
+                applied = [row for row in scored if row[0]["id"] in written]
+                stats["leaderboard_rows"] += await self.leaderboard.apply(
+                    accumulate_deltas(
+                        {},
+                        [pred for pred, _, _ in applied],
+                        [pred_points for _, pred_points, _ in applied],
+                        [status for _, _, status in applied],
+                        matches,
+                    )
+                )
+            # La última página (vacía) también es una consulta
+            stats["select_queries"] += 1
+
+        chunks = [match_ids[start:start + match_chunk] for start in range(0, len(match_ids), match_chunk)]
+        await asyncio.gather(*(_settle_chunk(chunk) for chunk in chunks))
+
+        if not stats["predictions"]:
             print("   -> No hay predicciones pendientes de puntuar.")
-            return
-
-        updates = []
-        
-        # 2. Iterar y aplicar reglas
-        for pred in predictions:
-            points = 0
-            status = "lose" # win, exact, lose
-            
-            # Usamos .get() por seguridad, aunque deberían existir
-            pred_home = pred.get("home_score")
-            pred_away = pred.get("away_score")
-            
-            # --- LÓGICA DE PUNTUACIÓN ---
-            
-            # Evitamos errores si por alguna razón los scores son None
-            if pred_home is not None and pred_away is not None:
-                # Regla 1: Acierto Exacto (3 Puntos)
-                if pred_home == real_home and pred_away == real_away:
-                    points = 3
-                    status = "exact"
-                
-                # Regla 2: Acierto de Resultado/Signo (1 Punto)
-                elif (real_home > real_away and pred_home > pred_away) or \
-                     (real_home == real_away and pred_home == pred_away) or \
-                     (real_home < real_away and pred_home < pred_away):
-                    points = 1
-                    status = "win"
-            
-            # --- CORRECCIÓN DEL ERROR 23502 ---
-            # Al hacer upsert, enviamos también el user_id y match_id originales
-            # para evitar que la DB piense que estamos insertando nulos.
-            updates.append({
-                "id": pred["id"],
-                "user_id": pred["user_id"],   # <--- CLAVE: Campo obligatorio
-                "match_id": pred["match_id"], # <--- CLAVE: Campo obligatorio
-                "home_score": pred_home,      # <--- Recomendable mantenerlo
-                "away_score": pred_away,      # <--- Recomendable mantenerlo
-                "points": points,
-                "status": status
-            })
-
-        # 3. Guardar en bloque (Upsert)
-        if updates:
-            # Upsert ahora tiene todos los datos necesarios para no fallar
-            self.db.supabase.table("predictions").upsert(updates).execute()
-            print(f"✅ Puntos actualizados para {len(updates)} usuarios.")
\ No newline at end of file
+        else:
+            print(f"✅ Puntos actualizados para {stats['predictions']} usuarios en {len(match_ids)} partidos.")
+        return stats
+
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket compartido por todo el tráfico hacia FotMob.
+
+    El ritmo (peticiones/s) se adapta con AIMD según lo que observa:
+    - 429: se divide el ritmo a la mitad y se pausa todo el tráfico
+      (Retry-After si viene, si no backoff exponencial).
+    - 5xx / error de red: recorte más suave y backoff exponencial.
+    - latencia por encima del objetivo: pequeño recorte.
+    - respuesta correcta y rápida: aumento aditivo hasta max_rate.
+
+    Las peticiones que terminan sin respuesta por causas que no son del
+    upstream (cancelación, bucle de redirecciones, cuerpo mal codificado)
+    devuelven el hueco con abort(), sin tocar el ritmo.
+
+    Además limita las peticiones simultáneas (max_in_flight). Con
+    enabled=False (replay sin red) solo cuenta peticiones.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: float,
+        max_in_flight: int,
+        latency_target: float,
+        increase_step: float = 0.25,
+        max_backoff: float = 60.0,
+        enabled: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.latency_target = latency_target
+        self.increase_step = increase_step
+        self.max_backoff = max_backoff
+
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._consecutive_failures = 0
+
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._waiting = 0
+        self._in_flight = 0
+
+        self.requests = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self.aborted = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> None:
+        """Espera turno (hueco de concurrencia + token). Llamar a release() al terminar."""
+        if not self.enabled:
+            self._in_flight += 1
+            return
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+            try:
+                # El lock hace de cola FIFO: solo el primero de la cola espera al token
+                async with self._lock:
+                    while True:
+                        now = time.monotonic()
+                        if now < self._blocked_until:
+                            await asyncio.sleep(self._blocked_until - now)
+                            continue
+                        self._refill(now)
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+                        await asyncio.sleep((1 - self._tokens) / self.rate)
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+
+    def release(self, status_code: Optional[int], latency: float, retry_after: Optional[float] = None) -> None:
+        """
+        Devuelve el hueco y ajusta el ritmo según el resultado.
+        status_code=None indica error de red/timeout.
+        """
+        self._in_flight -= 1
+        self.requests += 1
+        if not self.enabled:
+            return
+        self._slots.release()
+
+        now = time.monotonic()
+        if status_code == 429:
+            self.throttled += 1
+            self._consecutive_failures += 1
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self._block(now, retry_after)
+        elif status_code is None or status_code >= 500:
+            self.server_errors += 1
+            self._consecutive_failures += 1
+            self.rate = max(self.min_rate, self.rate * 0.7)
+            self._block(now, None)
+        else:
+            self._consecutive_failures = 0
+            if latency > self.latency_target:
+                self.rate = max(self.min_rate, self.rate * 0.9)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def abort(self) -> None:
+        """Devuelve el hueco sin ajustar el ritmo: la petición no dice nada del upstream."""
+        self._in_flight -= 1
+        self.aborted += 1
+        if self.enabled:
+            self._slots.release()
+
+    def _block(self, now: float, retry_after: Optional[float]) -> None:
+        if retry_after is None:
+            retry_after = min(self.max_backoff, 0.5 * 2 ** (self._consecutive_failures - 1))
+        self._blocked_until = max(self._blocked_until, now + min(retry_after, self.max_backoff))
+        # Tras la pausa no queremos una ráfaga
+        self._tokens = min(self._tokens, 1.0)
+
+    def metrics(self) -> dict:
+        return {
+            "rate": round(self.rate, 3),
+            "queue_depth": self._waiting,
+            "in_flight": self._in_flight,
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "server_errors": self.server_errors,
+            "aborted": self.aborted,
+        }
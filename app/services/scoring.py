@@ -0,0 +1,265 @@
+"""
+Reglas de puntuación de predicciones, configurables por competición y
+compiladas a una tabla de consulta.
+
+Cada predicción cae en un desenlace según (signo predicho, acierta el signo,
+marcador exacto, acierta la diferencia de goles), más uno para predicciones
+sin marcador. ScoringRules.compile() precalcula puntos y estado de cada
+desenlace, así que puntuar un lote es calcular el índice de desenlace con
+NumPy y leer la tabla: sin ramas por fila, y con varias tablas a la vez
+cuando el lote mezcla partidos de competiciones con reglas distintas.
+
+Reglas por defecto (las de siempre):
+
+- Pleno (marcador exacto): 3 puntos, estado "exact".
+- Signo (ganador o empate) sin marcador exacto: 1 punto, estado "win".
+- Fallo, o predicción sin marcador: 0 puntos, estado "lose".
+
+SCORING_RULES (config) las sobreescribe por competición y/o ronda, p. ej.
+puntos dobles en finales o bonus por acertar la diferencia de goles. Se
+valida al importar este módulo (al arrancar el worker o la API): una clave
+mal escrita impide arrancar en vez de hacer fallar cada lote liquidado.
+"""
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from operator import itemgetter
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+STATUS_EXACT = "exact"
+STATUS_SIGN = "win"
+STATUS_MISS = "lose"
+_STATUSES = np.array([STATUS_EXACT, STATUS_SIGN, STATUS_MISS], dtype=object)
+_EXACT, _SIGN, _MISS = 0, 1, 2
+
+# Desenlaces: 0 = sin marcador; 1 + ((signo_predicho + 1) * 2 + acierta_signo) * 4 + exacto * 2 + acierta_diferencia
+N_OUTCOMES = 1 + 3 * 2 * 2 * 2
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRules:
+    points: np.ndarray  # int64 por desenlace
+    statuses: np.ndarray  # índice en _STATUSES por desenlace
+
+
+@dataclass(frozen=True, slots=True)
+class ScoringRules:
+    exact_points: int = 3
+    sign_points: int = 1
+    miss_points: int = 0
+    # Extra sobre sign_points si además se acierta la diferencia de goles (sin ser exacto)
+    goal_diff_bonus: int = 0
+    # Extra por acertar un empate (exacto o no)
+    draw_bonus: int = 0
+    # Multiplica el total, p. ej. 2 en finales
+    multiplier: int = 1
+
+    def compile(self) -> CompiledRules:
+        return _compile(self)
+
+
+@lru_cache(maxsize=None)
+def _compile(rules: ScoringRules) -> CompiledRules:
+    points = np.zeros(N_OUTCOMES, dtype=np.int64)
+    statuses = np.zeros(N_OUTCOMES, dtype=np.int8)
+    points[0], statuses[0] = rules.miss_points * rules.multiplier, _MISS
+
+    for pred_sign in (-1, 0, 1):
+        for sign_hit in (0, 1):
+            for exact in (0, 1):
+                for diff_hit in (0, 1):
+                    draw = rules.draw_bonus if sign_hit and pred_sign == 0 else 0
+                    if exact:
+                        value, status = rules.exact_points + draw, _EXACT
+                    elif sign_hit:
+                        value, status = rules.sign_points + draw + (rules.goal_diff_bonus if diff_hit else 0), _SIGN
+                    else:
+                        value, status = rules.miss_points, _MISS
+                    index = 1 + ((pred_sign + 1) * 2 + sign_hit) * 4 + exact * 2 + diff_hit
+                    points[index], statuses[index] = value * rules.multiplier, status
+    return CompiledRules(points, statuses)
+
+
+DEFAULT_RULES = ScoringRules()
+
+
+def _normalize_round(round_name: Optional[str]) -> str:
+    return str(round_name).strip().lower() if round_name is not None else ""
+
+
+_RULE_FIELDS = {field.name for field in fields(ScoringRules)}
+
+
+def parse_rules_config(config: dict[str, dict[str, int]]) -> dict[str, dict[str, int]]:
+    """
+    Valida SCORING_RULES y lo devuelve con las rondas normalizadas. Lanza
+    ValueError si una clave no es "default", "<competition_id>",
+    "*:<ronda>" ni "<competition_id>:<ronda>", o si usa campos que
+    ScoringRules no tiene.
+    """
+    parsed: dict[str, dict[str, int]] = {}
+    for key, overrides in config.items():
+        scope, has_round, round_name = key.partition(":")
+        round_key = _normalize_round(round_name)
+        if has_round:
+            if not round_key or not (scope == "*" or scope.isdigit()):
+                raise ValueError(f"SCORING_RULES: clave inválida {key!r}")
+            key = f"{scope}:{round_key}"
+        elif scope != "default" and not scope.isdigit():
+            raise ValueError(f"SCORING_RULES: clave inválida {key!r}")
+
+        unknown = set(overrides) - _RULE_FIELDS
+        if unknown:
+            raise ValueError(
+                f"SCORING_RULES[{key!r}]: campos desconocidos {sorted(unknown)} "
+                f"(válidos: {sorted(_RULE_FIELDS)})"
+            )
+        parsed[key] = dict(overrides)
+    return parsed
+
+
+RULES_CONFIG = parse_rules_config(settings.SCORING_RULES)
+
+
+@lru_cache(maxsize=4096)
+def rules_for(competition_id: Optional[int], round_name: Optional[str] = None) -> ScoringRules:
+    """
+    Reglas de un partido según SCORING_RULES. Se aplican de menos a más
+    específica: "default", "<competition_id>", "*:<ronda>" y
+    "<competition_id>:<ronda>" (ronda tal y como la da FotMob, sin
+    distinguir mayúsculas: "final", "1/2"...).
+    """
+    config = RULES_CONFIG
+    round_key = _normalize_round(round_name)
+    keys = ["default", str(competition_id)]
+    if round_key:
+        keys += [f"*:{round_key}", f"{competition_id}:{round_key}"]
+
+    overrides: dict = {}
+    for key in keys:
+        overrides.update(config.get(key, {}))
+    return ScoringRules(**overrides) if overrides else DEFAULT_RULES
+
+
+def _column(rows: list[dict], name: str) -> np.ndarray:
+    """Columna de marcadores como float64; None pasa a NaN y nunca coincide con el resultado."""
+    getter = itemgetter(name)
+    try:
+        # Camino rápido: todas las filas traen un número
+        return np.fromiter(map(getter, rows), dtype=np.float64, count=len(rows))
+    except (TypeError, ValueError):
+        # Hay marcadores vacíos (None) o como texto
+        return np.array(list(map(getter, rows)), dtype=np.float64)
+    except KeyError:
+        return np.array([row.get(name) for row in rows], dtype=np.float64)
+
+
+def outcomes(
+    pred_home: np.ndarray,
+    pred_away: np.ndarray,
+    real_home: int | np.ndarray,
+    real_away: int | np.ndarray,
+) -> np.ndarray:
+    """
+    Índice de desenlace de cada predicción. El resultado real puede ser un
+    escalar o un array alineado con las predicciones (varios partidos a la vez).
+    """
+    pred_diff = pred_home - pred_away
+    real_diff = np.subtract(real_home, real_away)
+    pred_sign = np.sign(pred_diff)
+    sign_hit = pred_sign == np.sign(real_diff)
+    exact = (pred_home == real_home) & (pred_away == real_away)
+    diff_hit = pred_diff == real_diff
+
+    index = 1 + ((pred_sign + 1) * 2 + sign_hit) * 4 + exact * 2 + diff_hit
+    # NaN (marcador vacío) en cualquier lado -> desenlace 0
+    return np.where(np.isnan(pred_diff), 0, index).astype(np.intp)
+
+
+def score_arrays(
+    pred_home: np.ndarray,
+    pred_away: np.ndarray,
+    real_home: int | np.ndarray,
+    real_away: int | np.ndarray,
+    rules: ScoringRules = DEFAULT_RULES,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Puntos (int64) y estados (object) de cada predicción, con una consulta a la tabla compilada."""
+    compiled = rules.compile()
+    outcome = outcomes(pred_home, pred_away, real_home, real_away)
+    return compiled.points[outcome], _STATUSES[compiled.statuses[outcome]]
+
+
+def score_frame(
+    predictions: pd.DataFrame,
+    real_home: int,
+    real_away: int,
+    rules: ScoringRules = DEFAULT_RULES,
+) -> pd.DataFrame:
+    """Copia de un DataFrame con home_score/away_score añadiendo las columnas points y status."""
+    points, statuses = score_arrays(
+        pd.to_numeric(predictions["home_score"], errors="coerce").to_numpy(dtype=np.float64),
+        pd.to_numeric(predictions["away_score"], errors="coerce").to_numpy(dtype=np.float64),
+        real_home,
+        real_away,
+        rules,
+    )
+    return predictions.assign(points=points, status=statuses)
+
+
+def score_predictions(
+    predictions: list[dict],
+    real_home: int,
+    real_away: int,
+    rules: ScoringRules = DEFAULT_RULES,
+) -> tuple[list[int], list[str]]:
+    """Puntos y estados (listas de tipos nativos, listas para el upsert) de filas de predictions."""
+    if not predictions:
+        return [], []
+    points, statuses = score_arrays(
+        _column(predictions, "home_score"),
+        _column(predictions, "away_score"),
+        real_home,
+        real_away,
+        rules,
+    )
+    return points.tolist(), statuses.tolist()
+
+
+def score_many(
+    predictions: list[dict],
+    results: dict[int, tuple[int, int]],
+    rules: Optional[dict[int, ScoringRules]] = None,
+) -> tuple[list[int], list[str]]:
+    """
+    Como score_predictions, para predicciones de varios partidos con su
+    resultado en results[match_id] y sus reglas en rules[match_id] (por
+    defecto DEFAULT_RULES).
+    """
+    if not predictions:
+        return [], []
+    rules = rules or {}
+    match_ids = _column(predictions, "match_id")
+    # Un resultado y una tabla por partido distinto, repartidos luego a sus predicciones
+    unique_ids, inverse = np.unique(match_ids, return_inverse=True)
+    real = np.array([results[int(match_id)] for match_id in unique_ids], dtype=np.float64)
+
+    match_rules = [rules.get(int(match_id), DEFAULT_RULES) for match_id in unique_ids]
+    distinct = list(dict.fromkeys(match_rules))
+    tables = [rule.compile() for rule in distinct]
+    points_table = np.stack([table.points for table in tables])
+    status_table = np.stack([table.statuses for table in tables])
+    table_index = np.array([distinct.index(rule) for rule in match_rules], dtype=np.intp)[inverse]
+
+    outcome = outcomes(
+        _column(predictions, "home_score"),
+        _column(predictions, "away_score"),
+        real[inverse, 0],
+        real[inverse, 1],
+    )
+    points = points_table[table_index, outcome]
+    statuses = _STATUSES[status_table[table_index, outcome]]
+    return points.tolist(), statuses.tolist()
@@ -1,324 +1,447 @@
+import asyncio
+import hashlib
 import httpx
-from datetime import datetime
-from typing import List
-from app.schemas.match import MatchData, TeamInfo, MatchStatus, CompetitionData
-from app.core.config import FOTMOB_TARGET_LEAGUE_IDS
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, List, Optional
+from app.schemas.match import CompetitionData
+from app.core.config import FOTMOB_TARGET_LEAGUE_IDS, settings
+from app.services import interning
+from app.services.fotmob_decode import decode_target_leagues
+from app.services.http_client import LatencyRecorder, RequestTiming, build_fotmob_client
+from app.services.normalizer import build_competition, league_context
+from app.services.rate_limiter import AdaptiveRateLimiter
+from app.services.singleflight import SingleFlight
+
+logger = logging.getLogger("Scraper")
+
+# Cuántas fechas del feed diario recordamos para las peticiones condicionales
+FEED_CACHE_MAX_DATES = 8
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None # Formato fecha HTTP: dejamos que el limitador use su backoff
+
 
 class ScraperService:
-    def __init__(self):
-        # Inicializamos con caché configurado para no ser bloqueados
-        # data_dir define donde se guardan los logs/cache
-        pass
-    
-    def _extract_round(self, match_data: dict) -> str:
-        # Prioridad 1: Campo 'round' (Suele ser el código: "1/8", "playoff", "1")
-        if "round" in match_data:
-            val = match_data["round"]
-            if isinstance(val, str): return val
-            if isinstance(val, int): return str(val)
-            if isinstance(val, dict): return val.get("name") # Por si acaso viene anidado
-        
-        # Prioridad 2: Campo 'roundName' (A veces es int: 1)
-        if "roundName" in match_data:
-            return str(match_data["roundName"])
-            
-        return None
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        # Un único cliente con pool keep-alive (y HTTP/2) para todas las peticiones
+        # a FotMob. Se crea perezosamente dentro del event loop y se cierra con aclose().
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.latency = LatencyRecorder()
+        # Un único limitador para todos los jobs que comparten este scraper
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=settings.FOTMOB_RATE_INITIAL,
+            min_rate=settings.FOTMOB_RATE_MIN,
+            max_rate=settings.FOTMOB_RATE_MAX,
+            burst=settings.FOTMOB_RATE_BURST,
+            max_in_flight=settings.FOTMOB_MAX_IN_FLIGHT,
+            latency_target=settings.FOTMOB_LATENCY_TARGET,
+            # Reproduciendo del archivo no hay upstream que proteger
+            enabled=settings.FOTMOB_ARCHIVE_MODE != "replay",
+        )
+        # url -> {etag, last_modified, body_hash, competitions, saved} del último feed parseado
+        self._feed_cache: OrderedDict[str, dict] = OrderedDict()
+        # Deduplicación de peticiones idénticas en vuelo (API + worker en ráfaga)
+        self._single_flight = SingleFlight()
+
+    def metrics(self) -> dict:
+        """Métricas del tráfico hacia FotMob: latencias, limitador, peticiones deduplicadas e interning."""
+        return {
+            "latency": self.latency.snapshot(),
+            "rate_limiter": self.rate_limiter.metrics(),
+            "single_flight": self._single_flight.metrics(),
+            "interning": interning.metrics(),
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = build_fotmob_client(self._transport)
+        return self._client
+
+    async def aclose(self) -> None:
+        """Cierra el pool de conexiones. Llamar al apagar el worker/API."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "ScraperService":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _get(self, url: str, headers: Optional[dict] = None) -> httpx.Response:
+        """
+        GET sobre el cliente compartido. Pasa por el limitador adaptativo,
+        reintenta 429/5xx/errores de red (con la pausa que marque el
+        limitador) y registra el desglose de latencia.
+        """
+        client = self._get_client()
+        max_retries = settings.FOTMOB_MAX_RETRIES
+
+        for attempt in range(max_retries + 1):
+            await self.rate_limiter.acquire()
+            timing = RequestTiming()
+            response = None
+            network_error = False
+            try:
+                response = await client.get(url, headers=headers, extensions={"trace": timing.trace})
+            except httpx.TransportError:
+                network_error = True
+                if attempt == max_retries:
+                    raise
+                logger.warning("GET %s falló por red, reintentando (%s/%s)", url, attempt + 1, max_retries)
+                continue
+            finally:
+                # El hueco del limitador se devuelve siempre. Solo la respuesta o el
+                # error de red ajustan el ritmo: una cancelación o un error que no
+                # viene del upstream (redirecciones, decodificación) no penalizan
+                # al resto del tráfico
+                timing.finish()
+                if response is not None:
+                    self.rate_limiter.release(response.status_code, timing.total, _retry_after(response))
+                elif network_error:
+                    self.rate_limiter.release(None, timing.total)
+                else:
+                    self.rate_limiter.abort()
+
+            self.latency.record(response.request.url.path, timing)
+            logger.debug(
+                "GET %s -> %s en %.1fms (conexión nueva: %s, connect %.1fms, tls %.1fms, espera %.1fms)",
+                url, response.status_code, timing.total * 1000, timing.new_connection,
+                timing.phases["connect"] * 1000, timing.phases["tls"] * 1000, timing.phases["wait"] * 1000,
+            )
+
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < max_retries:
+                logger.warning("GET %s -> %s, reintentando (%s/%s)", url, response.status_code, attempt + 1, max_retries)
+                continue
+            return response
 
     async def get_live_matches_fotmob(self, target_date: str = None) -> List[CompetitionData]:
+        competitions, _ = await self.fetch_live_matches(target_date)
+        return competitions
+
+    async def fetch_live_matches(self, target_date: str = None) -> tuple[List[CompetitionData], bool]:
+        """
+        Descarga el feed diario con petición condicional. Devuelve
+        (competiciones, unchanged): si FotMob responde 304 o el cuerpo es
+        idéntico al anterior, se reutiliza el resultado ya parseado.
+        unchanged=True solo si además ese resultado ya se guardó (ver
+        mark_saved), para que el llamante pueda saltarse el guardado sin
+        perder un feed cuyo guardado falló.
+        """
         # Usamos la fecha de hoy
         date_str = target_date if target_date else datetime.now().strftime("%Y%m%d")
 
+        # Llamadas concurrentes para la misma fecha comparten una sola descarga
+        return await self._single_flight.do(("matches", date_str), lambda: self._fetch_live_matches(date_str))
+
+    async def iter_matches_for_dates(self, start: date, end: date) -> AsyncIterator[tuple[str, List[CompetitionData]]]:
+        """
+        Descarga el feed diario de todas las fechas entre start y end (ambas
+        incluidas) en paralelo, bajo el limitador compartido, y va devolviendo
+        (fecha 'YYYYMMDD', competiciones) según terminan, no en orden. Un día
+        que falla se devuelve con lista vacía.
+        """
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        tasks = [asyncio.ensure_future(self._matches_for_day(day.strftime("%Y%m%d"))) for day in days]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Si el consumidor corta la iteración, no dejamos descargas huérfanas
+            for task in tasks:
+                task.cancel()
+
+    async def _matches_for_day(self, date_str: str) -> tuple[str, List[CompetitionData]]:
+        try:
+            return date_str, await self.get_live_matches_fotmob(target_date=date_str)
+        except Exception as e:
+            logger.error("Error fetching matches for %s: %s", date_str, e)
+            return date_str, []
+
+    async def _fetch_live_matches(self, date_str: str) -> tuple[List[CompetitionData], bool]:
         url = f"https://www.fotmob.com/api/data/matches?date={date_str}"
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+        cached = self._feed_cache.get(url)
+        headers = {}
+        if cached:
+            self._feed_cache.move_to_end(url)
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = await self._get(url, headers=headers)
+
+        if cached and response.status_code == 304:
+            return cached["competitions"], cached["saved"]
+
+        # Si el servidor no soporta validadores, comparamos la huella del cuerpo
+        body_hash = hashlib.blake2b(response.content, digest_size=16).digest()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if cached and cached["body_hash"] == body_hash:
+            cached["etag"] = etag
+            cached["last_modified"] = last_modified
+            return cached["competitions"], cached["saved"]
+
+        competitions = self._parse_live_matches(self._decode_target_leagues(response.content))
+
+        self._feed_cache[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": body_hash,
+            "competitions": competitions,
+            # Se confirma con mark_saved() cuando el llamante lo haya persistido
+            "saved": False,
         }
+        self._feed_cache.move_to_end(url)
+        while len(self._feed_cache) > FEED_CACHE_MAX_DATES:
+            self._feed_cache.popitem(last=False)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            data = response.json()
+        return competitions, False
 
+    def mark_saved(self, competitions: List[CompetitionData]) -> None:
+        """
+        Confirma que el feed devuelto por fetch_live_matches ya está guardado:
+        desde entonces, mientras no cambie, se devuelve con unchanged=True.
+        Si entretanto llegó un feed distinto para esa fecha, no se marca.
+        """
+        for cached in self._feed_cache.values():
+            if cached["competitions"] is competitions:
+                cached["saved"] = True
+                return
 
-            # FotMob devuelve una estructura compleja, hay que navegarla
-            leagues_data = data.get("leagues", [])
-                 
-            target_leagues_ids = FOTMOB_TARGET_LEAGUE_IDS
-
-            result_competitions: List[CompetitionData] = []
-
-
-            for league in leagues_data:
-                # Filtramos solo ligas principales (puedes ajustar los IDs)
-                if league["primaryId"] in target_leagues_ids:
-                    parsed_matches = []
-                    for match in league.get("matches", []):
-                        status_obj = match.get("status", {})
-
-                        match_status = MatchStatus.NS # Por defecto Not Started
-
-                        if status_obj.get("cancelled"):
-                            match_status = MatchStatus.CANC
-                        elif status_obj.get("finished"):
-                            match_status = MatchStatus.FT
-                        elif status_obj.get("started"):
-                            match_status = MatchStatus.LIVE
-
-                        kickoff_str = match.get("time", "") # Fallback
-                        utc_time = status_obj.get("utcTime")
-                        minute_str = None
-
-                        if match_status == MatchStatus.LIVE:
-                            live_time = status_obj.get("liveTime", {})
-                            # FotMob suele poner el minuto en 'short' o 'timeStr'
-                            if isinstance(live_time, dict):
-                                minute_str = live_time.get("short") or live_time.get("long")
-
-                        if utc_time:
-                            try:
-                                # Parseamos ISO format (quitamos la Z para compatibilidad simple)
-                                dt = datetime.fromisoformat(utc_time.replace("Z", "+00:00"))
-                                # Formateamos al estilo que le gusta a tu Frontend
-                                kickoff_str = dt.strftime("%H:%M %d/%m/%Y") 
-                            except ValueError:
-                                pass
-                        
-                        # 3. Equipos
-                        home = match.get("home", {})
-                        away = match.get("away", {})
-
-                        round_name = self._extract_round(match)
-
-                        m_data = MatchData(
-                            id=match["id"],
-                            status=match_status,
-                            # Usamos 'scoreStr' ("0 - 0") o construimos manual si falla
-                            result=status_obj.get("scoreStr", f"{home.get('score',0)}-{away.get('score',0)}"),
-                            kickoff=kickoff_str,
-                            kickoff_iso=utc_time,
-                            minute=minute_str,
-                            round=round_name,
-                            homeId=home.get("id"),
-                            awayId=away.get("id"),
-                            competitionid=league["primaryId"],
-                            country=league.get("ccode", ""),
-                            homeTeam=TeamInfo(
-                                id=home.get("id"),
-                                name=home.get("name"),
-                                abbr=home.get("name")[:3].upper(), # FotMob no da abbr corto, lo generamos
-                                img=f"https://images.fotmob.com/image_resources/logo/teamlogo/{home.get("id")}.png",
-                                country=league.get("ccode", "")
-                            ),
-                            awayTeam=TeamInfo(
-                                id=away.get("id"),
-                                name=away.get("name"),
-                                abbr=away.get("name")[:3].upper(),
-                                img=f"https://images.fotmob.com/image_resources/logo/teamlogo/{away.get("id")}.png",
-                                country=league.get("ccode", "")
-                            ),
-                            events=[] # Los eventos detallados (goles, tarjetas) requieren otra llamada
-                        )
-                        parsed_matches.append(m_data)
-
-                    # Creamos el objeto de la competición con sus partidos
-                    if parsed_matches:
-                        comp_data = CompetitionData(
-                            id=str(league["primaryId"]),
-                            name=league["name"],
-                            fullName=league["name"], # FotMob no distingue longName en la lista principal
-                            badge=f"https://images.fotmob.com/image_resources/logo/leaguelogo/{league['primaryId']}.png",
-                            matches=parsed_matches
-                        )
-                        result_competitions.append(comp_data)
-
-            return result_competitions
+    def _decode_target_leagues(self, body: bytes) -> list[dict]:
+        """
+        Decodifica del feed diario (todas las ligas del mundo) solo las ligas
+        de FOTMOB_TARGET_LEAGUE_IDS; las demás se saltan sin crear objetos.
+        """
+        return decode_target_leagues(body, FOTMOB_TARGET_LEAGUE_IDS)
+
+    def _parse_live_matches(self, leagues_data: list[dict]) -> List[CompetitionData]:
+        result_competitions: List[CompetitionData] = []
+
+        for league in leagues_data:
+            ctx = league_context(league["primaryId"], league["name"], league.get("ccode", ""), True)
+            # Creamos el objeto de la competición con sus partidos
+            comp_data = build_competition(league.get("matches", []), ctx)
+            if comp_data:
+                result_competitions.append(comp_data)
+
+        return result_competitions
     
     async def get_standings(self, league_id: int):
         """
         Obtiene la clasificación de una liga específica desde FotMob
         """
+        return await self._single_flight.do(("standings", league_id), lambda: self._get_standings(league_id))
+
+    async def _get_standings(self, league_id: int):
         url = f"https://www.fotmob.com/api/data/tltable?leagueId={league_id}"
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=headers)
-                raw_data = response.json() # [{data:{}}]
+        try:
+            response = await self._get(url)
+            raw_data = response.json() # [{data:{}}]
 
-                if isinstance(raw_data, list) and len(raw_data) > 0:
-                    data_block = raw_data[0].get("data", {})
-                else:
-                    data_block = raw_data.get("data", {})
+            if isinstance(raw_data, list) and len(raw_data) > 0:
+                data_block = raw_data[0].get("data", {})
+            else:
+                data_block = raw_data.get("data", {})
 
-                table_all = []
+            table_all = []
 
-                if "tables" in data_block and isinstance(data_block["tables"], list) and len(data_block["tables"]) > 0:
-                    # Normalmente la primera tabla es la general (League phase)
-                    first_table_group = data_block["tables"][0]
-                    table_container = first_table_group.get("table", {})
-                    table_all = table_container.get("all", [])
-                    print(f"   ℹ️ Detectado formato 'tables' (Champions) con {len(table_all)} filas.")
+            if "tables" in data_block and isinstance(data_block["tables"], list) and len(data_block["tables"]) > 0:
+                # Normalmente la primera tabla es la general (League phase)
+                first_table_group = data_block["tables"][0]
+                table_container = first_table_group.get("table", {})
+                table_all = table_container.get("all", [])
+                print(f"   ℹ️ Detectado formato 'tables' (Champions) con {len(table_all)} filas.")
 
-                elif "table" in data_block:
-                    table_container = data_block.get("table", {})
-                    table_all = table_container.get("all", [])
+            elif "table" in data_block:
+                table_container = data_block.get("table", {})
+                table_all = table_container.get("all", [])
 
-                elif "composite" in data_block and isinstance(data_block["composite"], list):
-                     table_all = data_block["composite"]
+            elif "composite" in data_block and isinstance(data_block["composite"], list):
+                 table_all = data_block["composite"]
 
-                if not table_all:
-                    print(f"⚠️ [Scraper] No se encontraron datos de tabla para Liga {league_id}")
-                    return []
+            if not table_all:
+                print(f"⚠️ [Scraper] No se encontraron datos de tabla para Liga {league_id}")
+                return []
 
-                team_form_map = data_block.get("teamForm", {})
-                processed_standings = []
+            team_form_map = data_block.get("teamForm", {})
+            processed_standings = []
 
-                for team in table_all:
-                    team_id = team.get("id")
-                    team_id_str = str(team_id)
+            for team in table_all:
+                team_id = team.get("id")
+                team_id_str = str(team_id)
 
-                    goals_for = 0
-                    goals_against = 0
+                goals_for = 0
+                goals_against = 0
 
-                    scores_str = team.get("scoresStr", "")
+                scores_str = team.get("scoresStr", "")
 
-                    if scores_str and "-" in scores_str:
-                        try:
-                            parts = team["scoresStr"].split("-")
-                            goals_for = int(parts[0])
-                            goals_against = int(parts[1])
-                        except:
-                            pass
-                    
-                    form_raw = team_form_map.get(team_id_str, [])
-
-                    clean_team = {
-                        "position": team.get("idx"),
-                        "id": team.get("id"),
-                        "name": team.get("name"),
-                        "shortName": team.get("shortName"),
-                        "badge": f"{team.get('id')}.png", # Pre-calculamos la imagen
-                        "played": team.get("played"),
-                        "wins": team.get("wins"),
-                        "draws": team.get("draws"),
-                        "losses": team.get("losses"),
-                        "points": team.get("pts"),
-                        "goalsFor": goals_for,
-                        "goalsAgainst": goals_against,
-                        "goalDifference": team.get("goalConDiff"),
-                        "form": form_raw # Guardamos la lista de partidos recientes completa
-                    }
-                    processed_standings.append(clean_team)
+                if scores_str and "-" in scores_str:
+                    try:
+                        parts = team["scoresStr"].split("-")
+                        goals_for = int(parts[0])
+                        goals_against = int(parts[1])
+                    except:
+                        pass
                 
-                return processed_standings
+                form_raw = team_form_map.get(team_id_str, [])
+
+                clean_team = {
+                    "position": team.get("idx"),
+                    "id": team.get("id"),
+                    "name": team.get("name"),
+                    "shortName": team.get("shortName"),
+                    "badge": f"{team.get('id')}.png", # Pre-calculamos la imagen
+                    "played": team.get("played"),
+                    "wins": team.get("wins"),
+                    "draws": team.get("draws"),
+                    "losses": team.get("losses"),
+                    "points": team.get("pts"),
+                    "goalsFor": goals_for,
+                    "goalsAgainst": goals_against,
+                    "goalDifference": team.get("goalConDiff"),
+                    "form": form_raw # Guardamos la lista de partidos recientes completa
+                }
+                processed_standings.append(clean_team)
+            
+            return processed_standings
 
-            except Exception as e:
-                print(f"Error fetching standings for {league_id}: {e}")
-                return []
+        except Exception as e:
+            print(f"Error fetching standings for {league_id}: {e}")
+            return []
     
     async def get_match_details(self, match_id: int):
         """
         Obtiene los eventos detallados (goles, tarjetas, cambios) parseando
         el JSON complejo de matchFacts de FotMob.
         """
+        raw_events = await self.fetch_raw_match_events(match_id)
+        if raw_events is None:
+            return []
+        return self.parse_match_events(raw_events)
+
+    async def fetch_raw_match_events(self, match_id: int) -> Optional[list]:
+        """
+        Descarga matchDetails y devuelve la lista cruda de eventos sin
+        procesar (None si la petición falla). Permite calcular la huella del
+        partido antes de decidir si merece la pena parsearla.
+        """
+        return await self._single_flight.do(("details", match_id), lambda: self._fetch_raw_match_events(match_id))
+
+    async def _fetch_raw_match_events(self, match_id: int) -> Optional[list]:
         url = f"https://www.fotmob.com/api/data/matchDetails?matchId={match_id}"
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=headers)
-                data = response.json()
-                
-                # 1. Localizar el contenedor de eventos
-                # La estructura suele ser content -> matchFacts -> events -> events
-                # A veces puede variar, así que usamos .get() encadenados con seguridad
-                content = data.get("content", {})
-                match_facts = content.get("matchFacts", {})
-                
-                # Si no está en content, a veces está en general (depende de la versión de la API)
-                if not match_facts:
-                    match_facts = data.get("general", {}).get("matchFacts", {})
+        try:
+            response = await self._get(url)
+            data = response.json()
+            
+            # 1. Localizar el contenedor de eventos
+            # La estructura suele ser content -> matchFacts -> events -> events
+            # A veces puede variar, así que usamos .get() encadenados con seguridad
+            content = data.get("content", {})
+            match_facts = content.get("matchFacts", {})
+            
+            # Si no está en content, a veces está en general (depende de la versión de la API)
+            if not match_facts:
+                match_facts = data.get("general", {}).get("matchFacts", {})
+
+            events_container = match_facts.get("events", {})
+            return events_container.get("events", [])
+
+        except Exception as e:
+            print(f"⚠️ Error fetching details for match {match_id}: {e}")
+            return None
 
-                events_container = match_facts.get("events", {})
-                raw_events = events_container.get("events", [])
+    def parse_match_events(self, raw_events: list) -> list:
+        """Convierte los eventos crudos de matchFacts al formato que guardamos en Supabase."""
+        try:
+            processed_events = []
+            
+            for event in raw_events:
+                event_type = event.get("type")
+                new_score_list = event.get("newScore")
+
+                if new_score_list and len(new_score_list) >= 2:
+                    home_s = new_score_list[0]
+                    away_s = new_score_list[1]
+                else:
+                    home_s = event.get('homeScore')
+                    away_s = event.get('awayScore')
                 
-                processed_events = []
+                # Estructura base común
+                clean_event = {
+                    "type": event_type,
+                    "minute": event.get("time"),
+                    "timeStr": event.get("timeStr"), # A veces es "45+2"
+                    "isHome": event.get("isHome"),
+                    "score": {
+                        "home": home_s,
+                        "away": away_s
+                    },
+                    "isPenaltyShootout": event.get("isPenaltyShootoutEvent", False)
+                }
+
+                # --- Lógica específica por tipo de evento ---
                 
-                for event in raw_events:
-                    event_type = event.get("type")
-                    new_score_list = event.get("newScore")
-
-                    if new_score_list and len(new_score_list) >= 2:
-                        home_s = new_score_list[0]
-                        away_s = new_score_list[1]
-                    else:
-                        home_s = event.get('homeScore')
-                        away_s = event.get('awayScore')
-                    
-                    # Estructura base común
-                    clean_event = {
-                        "type": event_type,
-                        "minute": event.get("time"),
-                        "timeStr": event.get("timeStr"), # A veces es "45+2"
-                        "isHome": event.get("isHome"),
-                        "score": {
-                            "home": home_s,
-                            "away": away_s
-                        },
-                        "isPenaltyShootout": event.get("isPenaltyShootoutEvent", False)
-                    }
-
-                    # --- Lógica específica por tipo de evento ---
-                    
-                    # 1. GOLES
-                    if event_type == "Goal":
-                        player = event.get("player", {}) or {}
-                        clean_event["player"] = player.get("name")
-                        clean_event["playerId"] = player.get("id")
-                        clean_event["assist"] = event.get("assistInput") # "Dani Olmo"
-                        clean_event["ownGoal"] = event.get("ownGoal", False)
-                        
-                        # Si es tanda de penaltis, suele venir marcado
-                        if event.get("isPenaltyShootoutEvent"):
-                            clean_event["isPenalty"] = True
-
-                    # 2. TARJETAS
-                    elif event_type == "Card":
-                        player = event.get("player", {}) or {}
-                        clean_event["player"] = player.get("name")
-                        clean_event["playerId"] = player.get("id")
-                        clean_event["cardType"] = event.get("card") # "Yellow" o "Red"
+                # 1. GOLES
+                if event_type == "Goal":
+                    player = event.get("player", {}) or {}
+                    clean_event["player"] = player.get("name")
+                    clean_event["playerId"] = player.get("id")
+                    clean_event["assist"] = event.get("assistInput") # "Dani Olmo"
+                    clean_event["ownGoal"] = event.get("ownGoal", False)
                     
-                    # 3. CAMBIOS (Substitution)
-                    elif event_type == "Substitution":
-                        # "swap" es una lista: [ {Saliente}, {Entrante} ] o viceversa
-                        # Normalmente el primero [0] es el que sale y el [1] el que entra
-                        swap = event.get("swap", [])
-                        if len(swap) >= 2:
-                            clean_event["playerOut"] = swap[0].get("name")
-                            clean_event["playerIn"] = swap[1].get("name")
-                            clean_event["playerOutId"] = swap[0].get("id")
-                            clean_event["playerInId"] = swap[1].get("id")
-                    
-                    # 4. EXTRAS (Descanso, Final, Tiempo añadido)
-                    # Opcional: Si quieres guardar cuando pitan el final o el descanso
-                    elif event_type in ["Half", "AddedTime"]:
-                        # Puedes guardarlos o ignorarlos. 
-                        # Si es "Half", event.get("halfStrShort") suele ser "HT" o "FT"
-                        clean_event["label"] = event.get("halfStrShort") or event.get("minutesAddedStr")
-
-                    processed_events.append(clean_event)
+                    # Si es tanda de penaltis, suele venir marcado
+                    if event.get("isPenaltyShootoutEvent"):
+                        clean_event["isPenalty"] = True
+
+                # 2. TARJETAS
+                elif event_type == "Card":
+                    player = event.get("player", {}) or {}
+                    clean_event["player"] = player.get("name")
+                    clean_event["playerId"] = player.get("id")
+                    clean_event["cardType"] = event.get("card") # "Yellow" o "Red"
+                
+                # 3. CAMBIOS (Substitution)
+                elif event_type == "Substitution":
+                    # "swap" es una lista: [ {Saliente}, {Entrante} ] o viceversa
+                    # Normalmente el primero [0] es el que sale y el [1] el que entra
+                    swap = event.get("swap", [])
+                    if len(swap) >= 2:
+                        clean_event["playerOut"] = swap[0].get("name")
+                        clean_event["playerIn"] = swap[1].get("name")
+                        clean_event["playerOutId"] = swap[0].get("id")
+                        clean_event["playerInId"] = swap[1].get("id")
                 
-                # Devolvemos la lista limpia, lista para guardar en el JSONB de Supabase
-                return processed_events
+                # 4. EXTRAS (Descanso, Final, Tiempo añadido)
+                # Opcional: Si quieres guardar cuando pitan el final o el descanso
+                elif event_type in ["Half", "AddedTime"]:
+                    # Puedes guardarlos o ignorarlos. 
+                    # Si es "Half", event.get("halfStrShort") suele ser "HT" o "FT"
+                    clean_event["label"] = event.get("halfStrShort") or event.get("minutesAddedStr")
+
+                processed_events.append(clean_event)
+            
+            # Devolvemos la lista limpia, lista para guardar en el JSONB de Supabase
+            return processed_events
 
-            except Exception as e:
-                print(f"⚠️ Error fetching details for match {match_id}: {e}")
-                return []
+        except Exception as e:
+            print(f"⚠️ Error parsing match events: {e}")
+            return []
     
     async def get_all_season_matches(self, league_id: int) -> List[CompetitionData]:
         """
@@ -328,99 +451,30 @@ class ScraperService:
         # Endpoint de liga: trae clasificación, partidos, estadísticas, etc.
         url = f"https://www.fotmob.com/api/data/leagues?id={league_id}"
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url, headers=headers)
-                data = response.json()
-                
-                # Estructura: data -> matches -> allMatches
-                fixtures = data.get("fixtures", {})
-                all_matches_raw = fixtures.get("allMatches", [])
-                
-                # Datos generales de la liga (nombre, país)
-                # A veces están en 'details' o en la raíz
-                details = data.get("details", {})
-                league_id = details.get("id")
-                league_name = details.get("name", "Unknown League")
-                country_code = details.get("country", "") #ESP
-
-                parsed_matches = []
-                
-                for match in all_matches_raw:
-                    status_obj = match.get("status", {})
-                    
-                    # Mapeo de status
-                    match_status = MatchStatus.NS
-                    if status_obj.get("cancelled"):
-                        match_status = MatchStatus.CANC
-                    elif status_obj.get("finished"):
-                        match_status = MatchStatus.FT
-                    elif status_obj.get("started"):
-                        match_status = MatchStatus.LIVE
-                    
-                    # Parsear fecha
-                    utc_time = status_obj.get("utcTime")
-                    kickoff_str = ""
-                    if utc_time:
-                        try:
-                            dt = datetime.fromisoformat(utc_time.replace("Z", "+00:00"))
-                            kickoff_str = dt.strftime("%H:%M %d/%m/%Y")
-                        except:
-                            pass
-                    
-                    home = match.get("home", {})
-                    away = match.get("away", {})
-
-                    round_name = self._extract_round(match)
-
-                    # Construir MatchData
-                    m_data = MatchData(
-                        id=match["id"],
-                        status=match_status,
-                        result=status_obj.get("scoreStr", "vs"),
-                        kickoff=kickoff_str,
-                        kickoff_iso=utc_time,
-                        round=round_name,
-                        # round=match.get("round"), # Si quisieras guardar la jornada
-                        minute=None, # En calendario global no suele venir el minuto exacto en vivo
-                        homeId=home.get("id"),
-                        awayId=away.get("id"),
-                        competitionid=league_id,
-                        country=country_code,
-                        homeTeam=TeamInfo(
-                            id=home.get("id"),
-                            name=home.get("name"),
-                            abbr=home.get("name")[:3].upper(),
-                            img=f"https://images.fotmob.com/image_resources/logo/teamlogo/{home.get('id')}.png",
-                            country=country_code
-                        ),
-                        awayTeam=TeamInfo(
-                            id=away.get("id"),
-                            name=away.get("name"),
-                            abbr=away.get("name")[:3].upper(),
-                            img=f"https://images.fotmob.com/image_resources/logo/teamlogo/{away.get('id')}.png",
-                            country=country_code
-                        ),
-                        events=[]
-                    )
-                    parsed_matches.append(m_data)
-
-                # Devolvemos una lista con un solo objeto CompetitionData lleno de partidos
-                if parsed_matches:
-                    return [CompetitionData(
-                        id=str(league_id),
-                        name=league_name,
-                        fullName=league_name,
-                        badge=f"https://images.fotmob.com/image_resources/logo/leaguelogo/{league_id}.png",
-                        matches=parsed_matches
-                    )]
-                
-                return []
+        try:
+            response = await self._get(url)
+            data = response.json()
+            
+            # Estructura: data -> matches -> allMatches
+            fixtures = data.get("fixtures", {})
+            all_matches_raw = fixtures.get("allMatches", [])
+            
+            # Datos generales de la liga (nombre, país)
+            # A veces están en 'details' o en la raíz
+            details = data.get("details", {})
+            league_id = details.get("id")
+            league_name = details.get("name", "Unknown League")
+            country_code = details.get("country", "") #ESP
+
+            ctx = league_context(league_id, league_name, country_code, False)
+
+            # Devolvemos una lista con un solo objeto CompetitionData lleno de partidos
+            comp_data = build_competition(all_matches_raw, ctx)
+            if comp_data:
+                return [comp_data]
+            
+            return []
 
-            except Exception as e:
-                print(f"Error fetching full season for league {league_id}: {e}")
-                return []
+        except Exception as e:
+            print(f"Error fetching full season for league {league_id}: {e}")
+            return []
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplica llamadas concurrentes con la misma clave: la primera lanza la
+    corrutina y las que llegan mientras está en vuelo esperan a ese mismo
+    resultado (o excepción) en vez de repetir la petición.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # shield: si un llamante se cancela, la petición sigue para los demás
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Evita el aviso de "exception was never retrieved" si nadie esperaba ya
+        if not task.cancelled():
+            task.exception()
+
+    def metrics(self) -> dict[str, Any]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
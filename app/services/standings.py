@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from app.services.scraper import ScraperService
+
+
+def standings_hash(standings: list) -> bytes:
+    """Huella del contenido de una clasificación ya procesada."""
+    payload = json.dumps(standings, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+@dataclass(slots=True)
+class StandingsUpdate:
+    league_id: int
+    standings: list
+    content_hash: bytes
+
+
+class StandingsTracker:
+    """
+    Refresco de clasificaciones con detección de cambios. Descarga varias
+    ligas a la vez (el limitador del scraper marca la concurrencia real) y
+    solo devuelve las tablas cuyo contenido cambió desde el último guardado.
+    El llamante confirma cada guardado con mark_written().
+    """
+
+    def __init__(self, scraper: ScraperService) -> None:
+        self.scraper = scraper
+        self._hashes: dict[int, bytes] = {}
+
+        self.skipped = 0
+        self.written = 0
+        self.failed = 0
+
+    async def poll(self, league_id: int) -> Optional[StandingsUpdate]:
+        """Devuelve la tabla si cambió desde el último guardado, si no None."""
+        try:
+            standings = await self.scraper.get_standings(league_id)
+        except Exception:
+            self.failed += 1
+            raise
+        if not standings:
+            self.failed += 1
+            return None
+
+        content_hash = standings_hash(standings)
+        if self._hashes.get(league_id) == content_hash:
+            self.skipped += 1
+            return None
+        return StandingsUpdate(league_id, standings, content_hash)
+
+    async def poll_many(self, league_ids: Iterable[int]) -> list[StandingsUpdate]:
+        """Consulta todas las ligas en paralelo y devuelve solo las que cambiaron."""
+        results = await asyncio.gather(*(self.poll(league_id) for league_id in league_ids), return_exceptions=True)
+        return [result for result in results if isinstance(result, StandingsUpdate)]
+
+    def mark_written(self, update: StandingsUpdate) -> None:
+        self.written += 1
+        self._hashes[update.league_id] = update.content_hash
+
+    def metrics(self, reset: bool = False) -> dict[str, Any]:
+        summary = {
+            "skipped": self.skipped,
+            "written": self.written,
+            "failed": self.failed,
+            "tracked_leagues": len(self._hashes),
+        }
+        if reset:
+            self.skipped = self.written = self.failed = 0
+        return summary
@@ -0,0 +1,525 @@
+"""
+Backends de almacenamiento intercambiables para DatabaseService.
+
+DatabaseService y PointsService no hablan directamente con Supabase sino
+con un StorageBackend que expone las pocas operaciones que usan (upsert en
+bloque, incremento atómico de contadores, update por id, de una columna en
+bloque o condicionado al valor anterior, y select con filtros de igualdad /
+IS NULL / IN):
+
+- SupabaseBackend: PostgREST vía el cliente async de supabase-py (producción).
+- SQLiteBackend: fichero SQLite local que replica las tablas competitions,
+  matches, predictions y leaderboard, para correr worker, liquidación de puntos y API de
+  punta a punta en una sola máquina (p. ej. con FOTMOB_ARCHIVE_MODE=replay)
+  y comparar el rendimiento de escritura de ambos.
+
+Se elige con STORAGE_BACKEND ("supabase" o "sqlite").
+"""
+import asyncio
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Optional
+
+import httpx
+from postgrest.types import ReturnMethod
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
+
+from app.core.config import settings
+
+
+class StorageBackend(ABC):
+    """Operaciones de tabla que necesita la capa de persistencia."""
+
+    name: str
+
+    @abstractmethod
+    async def upsert(self, table: str, rows: list[dict]) -> None:
+        """Inserta o actualiza (por id) un bloque de filas."""
+
+    @abstractmethod
+    async def increment(self, table: str, rows: list[dict], counters: tuple[str, ...]) -> None:
+        """
+        Inserta un bloque de filas o, si su id ya existe, suma a la fila
+        guardada los valores de las columnas de counters (las demás se
+        sobreescriben). Atómico en la DB: escritores concurrentes no se
+        pisan las sumas.
+        """
+
+    @abstractmethod
+    async def update(self, table: str, row_id: Any, values: dict) -> None:
+        """Actualiza columnas sueltas de la fila con ese id."""
+
+    @abstractmethod
+    async def update_column(self, table: str, column: str, values: dict[Any, Any]) -> None:
+        """
+        Escribe column (y updated_at) en las filas existentes de cada id de
+        values ({id: valor}) en una sola operación, sin tocar el resto de
+        columnas. Los ids que no existen se ignoran.
+        """
+
+    @abstractmethod
+    async def compare_and_set(self, table: str, rows: list[dict], columns: tuple[str, ...]) -> set[Any]:
+        """
+        Para cada fila ({"id", <columna>, "old_<columna>"...}) escribe los
+        valores nuevos de columns solo si la fila guardada sigue teniendo los
+        old_<columna> (NULL incluido). Atómico por fila en la DB: de dos
+        escritores con la misma lectura solo gana uno. Devuelve los ids
+        escritos.
+        """
+
+    @abstractmethod
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        eq: Optional[dict[str, Any]] = None,
+        is_null: Iterable[str] = (),
+        in_: Optional[dict[str, Iterable[Any]]] = None,
+        order_by: Optional[str] = None,
+        after: Any = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+    ) -> list[dict]:
+        """
+        Filas que cumplen todas las igualdades de eq, tienen a NULL las
+        columnas de is_null y cuyo valor en cada columna de in_ está en la
+        lista dada. Con order_by salen ordenadas por esa columna (ascendente,
+        o descendente con descending) y, si se da after, solo las que van
+        detrás de after en ese orden; limit acota cuántas.
+        """
+
+    async def iter_pages(
+        self,
+        table: str,
+        columns: str = "*",
+        page_size: int = 1000,
+        key: str = "id",
+        **filters: Any,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Recorre las filas de select(**filters) en páginas de como mucho
+        page_size, paginando por clave (key > última vista) en vez de por
+        offset: actualizar filas ya leídas (p. ej. dejar de cumplir
+        points IS NULL) no desplaza las páginas siguientes. Para solo al
+        recibir una página vacía, así que un tope de filas del servidor
+        menor que page_size (max-rows de PostgREST) no corta el recorrido.
+        """
+        after = None
+        while True:
+            rows = await self.select(table, columns, order_by=key, after=after, limit=page_size, **filters)
+            if not rows:
+                return
+            yield rows
+            after = rows[-1][key]
+
+    async def aclose(self) -> None:
+        pass
+
+
+class SupabaseBackend(StorageBackend):
+    name = "supabase"
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None) -> None:
+        self.url = url or settings.SUPABASE_URL
+        self.key = key or settings.SUPABASE_SERVICE_ROLE_KEY
+        if not self.url or not self.key:
+            raise RuntimeError("STORAGE_BACKEND=supabase requiere SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY")
+
+        # Cliente async con pool de conexiones compartido. Se crea perezosamente
+        # dentro del event loop (ver client()) y se cierra con aclose().
+        self.supabase: Optional[AsyncClient] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._init_lock = asyncio.Lock()
+        # Limita las peticiones simultáneas a Supabase de todos los jobs
+        self._slots = asyncio.Semaphore(settings.DB_MAX_CONCURRENCY)
+
+    async def client(self) -> AsyncClient:
+        if self.supabase is None:
+            async with self._init_lock:
+                if self.supabase is None:
+                    self._http = httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=settings.DB_MAX_CONCURRENCY,
+                            max_keepalive_connections=settings.DB_MAX_CONCURRENCY,
+                        ),
+                        timeout=settings.DB_TIMEOUT,
+                        follow_redirects=True,
+                        http2=True,
+                    )
+                    self.supabase = await acreate_client(
+                        self.url,
+                        self.key,
+                        options=AsyncClientOptions(httpx_client=self._http),
+                    )
+        return self.supabase
+
+    async def execute(self, query) -> Any:
+        """Ejecuta una query de postgrest respetando el límite de concurrencia."""
+        async with self._slots:
+            return await query.execute()
+
+    async def upsert(self, table: str, rows: list[dict]) -> None:
+        client = await self.client()
+        # returning=minimal: no necesitamos que Supabase nos devuelva las filas
+        await self.execute(client.table(table).upsert(rows, returning=ReturnMethod.minimal))
+
+    async def increment(self, table: str, rows: list[dict], counters: tuple[str, ...]) -> None:
+        # PostgREST no sabe sumar sobre la fila existente: lo hace la función
+        # <tabla>_increment(rows jsonb) con INSERT ... ON CONFLICT (id) DO UPDATE
+        # (ver su definición en app/services/leaderboard.py)
+        client = await self.client()
+        await self.execute(client.rpc(f"{table}_increment", {"rows": rows}))
+
+    async def update(self, table: str, row_id: Any, values: dict) -> None:
+        client = await self.client()
+        await self.execute(client.table(table).update(values, returning=ReturnMethod.minimal).eq("id", row_id))
+
+    async def compare_and_set(self, table: str, rows: list[dict], columns: tuple[str, ...]) -> set[Any]:
+        """
+        Con la función RPC <tabla>_compare_and_set(rows jsonb), que devuelve
+        los ids escritos. La de la liquidación:
+
+            create or replace function predictions_compare_and_set(rows jsonb) returns setof int8
+            language sql as $$
+              update predictions as p set points = r.points, status = r.status
+              from jsonb_to_recordset(rows)
+                as r(id int8, points int, status text, old_points int, old_status text)
+              where p.id = r.id
+                and p.points is not distinct from r.old_points
+                and p.status is not distinct from r.old_status
+              returning p.id;
+            $$;
+        """
+        if not rows:
+            return set()
+        client = await self.client()
+        response = await self.execute(client.rpc(f"{table}_compare_and_set", {"rows": rows}))
+        return {row["id"] if isinstance(row, dict) else row for row in response.data or []}
+
+    async def update_column(self, table: str, column: str, values: dict[Any, Any]) -> None:
+        """
+        Con la función RPC <tabla>_set_<columna>(rows jsonb), un UPDATE ... FROM
+        jsonb_to_recordset. Las que usa DatabaseService:
+
+            create or replace function matches_set_events(rows jsonb) returns void
+            language sql as $$
+              update matches as m set events = r.events, updated_at = now()
+              from jsonb_to_recordset(rows) as r(id int8, events jsonb)
+              where m.id = r.id;
+            $$;
+
+            create or replace function competitions_set_standings(rows jsonb) returns void
+            language sql as $$
+              update competitions as c set standings = r.standings, updated_at = now()
+              from jsonb_to_recordset(rows) as r(id int8, standings jsonb)
+              where c.id = r.id;
+            $$;
+        """
+        client = await self.client()
+        rows = [{"id": row_id, column: value} for row_id, value in values.items()]
+        await self.execute(client.rpc(f"{table}_set_{column}", {"rows": rows}))
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        eq: Optional[dict[str, Any]] = None,
+        is_null: Iterable[str] = (),
+        in_: Optional[dict[str, Iterable[Any]]] = None,
+        order_by: Optional[str] = None,
+        after: Any = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+    ) -> list[dict]:
+        client = await self.client()
+        query = client.table(table).select(columns)
+        for column, value in (eq or {}).items():
+            query = query.eq(column, value)
+        for column in is_null:
+            query = query.is_(column, "null")
+        for column, values in (in_ or {}).items():
+            query = query.in_(column, list(values))
+        if order_by is not None:
+            if after is not None:
+                query = query.lt(order_by, after) if descending else query.gt(order_by, after)
+            query = query.order(order_by, desc=descending)
+        if limit is not None:
+            query = query.limit(limit)
+        response = await self.execute(query)
+        return response.data
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self.supabase = None
+
+
+# Réplica local del esquema de Supabase (solo las columnas que usa el backend)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS competitions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    badge TEXT,
+    sport_id INTEGER,
+    standings TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    competition_id INTEGER NOT NULL REFERENCES competitions(id),
+    sport_id INTEGER,
+    status TEXT NOT NULL,
+    kickoff TEXT,
+    minute TEXT,
+    round TEXT,
+    home_team_id INTEGER,
+    away_team_id INTEGER,
+    home_score INTEGER,
+    away_score INTEGER,
+    home_team_data TEXT,
+    away_team_data TEXT,
+    events TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    home_score INTEGER,
+    away_score INTEGER,
+    points INTEGER,
+    status TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS predictions_match_id_idx ON predictions (match_id);
+CREATE TABLE IF NOT EXISTS leaderboard (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    competition_id INTEGER,
+    round TEXT,
+    points INTEGER NOT NULL,
+    predictions INTEGER NOT NULL,
+    exact INTEGER NOT NULL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS leaderboard_scope_idx ON leaderboard (scope, competition_id, round, points);
+"""
+
+# Columnas jsonb en Postgres: en SQLite se guardan como texto JSON
+SQLITE_JSON_COLUMNS = {
+    "competitions": {"standings"},
+    "matches": {"home_team_data", "away_team_data", "events"},
+    "predictions": set(),
+    "leaderboard": set(),
+}
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend sobre un fichero SQLite local. Usa una única conexión en un hilo
+    dedicado (sqlite3 es bloqueante y sus conexiones no se comparten entre
+    hilos), así que las escrituras se serializan igual que en un único
+    escritor de SQLite, sin bloquear el event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or settings.SQLITE_PATH
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SQLITE_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    @staticmethod
+    def _json_columns(table: str) -> set[str]:
+        try:
+            return SQLITE_JSON_COLUMNS[table]
+        except KeyError:
+            raise ValueError(f"Tabla desconocida para SQLite: {table}") from None
+
+    @staticmethod
+    def _adapt(column: str, value: Any, json_columns: set[str]) -> Any:
+        if column in json_columns and value is not None:
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+        if value == "now()":
+            return datetime.now(timezone.utc).isoformat()
+        if isinstance(value, Enum):
+            return value.value
+        return value
+
+    def _upsert_sync(self, table: str, rows: list[dict], counters: tuple[str, ...] = ()) -> None:
+        json_columns = self._json_columns(table)
+        # Un executemany por cada juego de columnas (normalmente uno solo)
+        groups: dict[tuple[str, ...], list[tuple]] = {}
+        for row in rows:
+            columns = tuple(row)
+            groups.setdefault(columns, []).append(
+                tuple(self._adapt(column, row[column], json_columns) for column in columns)
+            )
+
+        conn = self._connection()
+        with conn:
+            for columns, values in groups.items():
+                assignments = ", ".join(
+                    f"{column} = {column} + excluded.{column}" if column in counters else f"{column} = excluded.{column}"
+                    for column in columns
+                    if column != "id"
+                )
+                conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                    f"ON CONFLICT(id) DO UPDATE SET {assignments}",
+                    values,
+                )
+
+    def _update_sync(self, table: str, row_id: Any, values: dict) -> None:
+        json_columns = self._json_columns(table)
+        columns = list(values)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                [self._adapt(column, values[column], json_columns) for column in columns] + [row_id],
+            )
+
+    def _compare_and_set_sync(self, table: str, rows: list[dict], columns: tuple[str, ...]) -> set[Any]:
+        json_columns = self._json_columns(table)
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        # IS compara también NULL con NULL
+        guards = " AND ".join(f"{column} IS ?" for column in columns)
+        sql = f"UPDATE {table} SET {assignments} WHERE id = ? AND {guards}"
+        written = set()
+        conn = self._connection()
+        with conn:
+            for row in rows:
+                params = [self._adapt(column, row[column], json_columns) for column in columns]
+                params.append(row["id"])
+                params.extend(self._adapt(column, row[f"old_{column}"], json_columns) for column in columns)
+                if conn.execute(sql, params).rowcount:
+                    written.add(row["id"])
+        return written
+
+    def _update_column_sync(self, table: str, column: str, values: dict[Any, Any]) -> None:
+        json_columns = self._json_columns(table)
+        updated_at = self._adapt("updated_at", "now()", json_columns)
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                f"UPDATE {table} SET {column} = ?, updated_at = ? WHERE id = ?",
+                [(self._adapt(column, value, json_columns), updated_at, row_id) for row_id, value in values.items()],
+            )
+
+    def _select_sync(
+        self,
+        table: str,
+        columns: str,
+        eq: dict[str, Any],
+        is_null: Iterable[str],
+        in_: dict[str, list],
+        order_by: Optional[str],
+        after: Any,
+        limit: Optional[int],
+        descending: bool,
+    ) -> list[dict]:
+        json_columns = self._json_columns(table)
+        conditions = [f"{column} = ?" for column in eq] + [f"{column} IS NULL" for column in is_null]
+        params = [self._adapt(column, value, json_columns) for column, value in eq.items()]
+        for column, values in in_.items():
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(self._adapt(column, value, json_columns) for value in values)
+        if order_by is not None and after is not None:
+            conditions.append(f"{order_by} {'<' if descending else '>'} ?")
+            params.append(after)
+        sql = f"SELECT {columns} FROM {table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by is not None:
+            sql += f" ORDER BY {order_by}{' DESC' if descending else ''}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = []
+        for record in self._connection().execute(sql, params):
+            row = dict(record)
+            for column in json_columns.intersection(row):
+                if row[column] is not None:
+                    row[column] = json.loads(row[column])
+            rows.append(row)
+        return rows
+
+    async def upsert(self, table: str, rows: list[dict]) -> None:
+        if rows:
+            await self._run(self._upsert_sync, table, rows)
+
+    async def increment(self, table: str, rows: list[dict], counters: tuple[str, ...]) -> None:
+        if rows:
+            await self._run(self._upsert_sync, table, rows, counters)
+
+    async def update(self, table: str, row_id: Any, values: dict) -> None:
+        await self._run(self._update_sync, table, row_id, values)
+
+    async def compare_and_set(self, table: str, rows: list[dict], columns: tuple[str, ...]) -> set[Any]:
+        if not rows:
+            return set()
+        return await self._run(self._compare_and_set_sync, table, rows, columns)
+
+    async def update_column(self, table: str, column: str, values: dict[Any, Any]) -> None:
+        if values:
+            await self._run(self._update_column_sync, table, column, values)
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        eq: Optional[dict[str, Any]] = None,
+        is_null: Iterable[str] = (),
+        in_: Optional[dict[str, Iterable[Any]]] = None,
+        order_by: Optional[str] = None,
+        after: Any = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+    ) -> list[dict]:
+        in_lists = {column: list(values) for column, values in (in_ or {}).items()}
+        return await self._run(
+            self._select_sync, table, columns, eq or {}, tuple(is_null), in_lists, order_by, after, limit, descending
+        )
+
+    async def aclose(self) -> None:
+        def _close() -> None:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+
+        await self._run(_close)
+
+
+def build_storage_backend(kind: Optional[str] = None) -> StorageBackend:
+    """Backend configurado en STORAGE_BACKEND (o el indicado en kind)."""
+    kind = (kind or settings.STORAGE_BACKEND).lower()
+    if kind == "supabase":
+        return SupabaseBackend()
+    if kind == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"STORAGE_BACKEND desconocido: {kind!r} (usa 'supabase' o 'sqlite')")
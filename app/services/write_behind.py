@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger("WriteBehind")
+
+
+class WriteBehindBuffer:
+    """
+    Buffer de escritura diferida con coalescencia por clave.
+
+    put() solo encola: si la misma fila (clave) se actualiza varias veces antes
+    del flush, gana la última escritura. El buffer se vuelca con flush_fn en
+    bloque cuando alcanza max_size entradas o cuando la entrada más antigua
+    lleva max_delay segundos esperando.
+
+    Los flushes van de uno en uno, así que las escrituras de una misma clave
+    llegan a la DB en orden. Cada put() lleva un número de secuencia: si un
+    flush falla, solo se reencolan las entradas que nadie ha vuelto a
+    actualizar entre medias (una más nueva ya pendiente o escrita manda), y el
+    temporizador se rearma para reintentarlas pasados max_delay segundos.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[dict[Hashable, Any]], Awaitable[None]],
+        max_size: int,
+        max_delay: float,
+    ) -> None:
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_size = max_size
+        self.max_delay = max_delay
+
+        # clave -> (secuencia, valor)
+        self._pending: dict[Hashable, tuple[int, Any]] = {}
+        # Última secuencia encolada de cada clave pendiente o en vuelo
+        self._latest: dict[Hashable, int] = {}
+        self._seq = 0
+        self._oldest: Optional[float] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()
+        self._flush_lock = asyncio.Lock()
+        self._in_flight = 0
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushed_rows = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self._flush_seconds = 0.0
+        self._max_flush_seconds = 0.0
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self.enqueued += 1
+        if key in self._pending:
+            self.coalesced += 1
+        self._seq += 1
+        self._pending[key] = (self._seq, value)
+        self._latest[key] = self._seq
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+        if len(self._pending) >= self.max_size:
+            self._spawn_flush()
+        else:
+            self._ensure_timer()
+
+    def _ensure_timer(self) -> None:
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.ensure_future(self._flush_after_deadline())
+
+    async def _flush_after_deadline(self) -> None:
+        while self._pending:
+            wait = self._oldest + self.max_delay - time.monotonic() if self._oldest is not None else self.max_delay
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            await self.flush()
+
+    def _spawn_flush(self) -> None:
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self) -> None:
+        """Vuelca ya todo lo pendiente en una llamada a flush_fn (tras el flush en curso, si lo hay)."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._oldest = None
+            self._in_flight += len(batch)
+
+            start = time.monotonic()
+            try:
+                await self.flush_fn({key: value for key, (_, value) in batch.items()})
+            except BaseException as e:
+                self._requeue(batch)
+                if not isinstance(e, Exception):
+                    raise  # cancelado (p. ej. drain): lo reencolado se vuelca después
+                self.flush_errors += 1
+                logger.error("Flush de %s falló (%s filas), se reintentará: %s", self.name, len(batch), e)
+            else:
+                self.flushed_rows += len(batch)
+                for key, (seq, _) in batch.items():
+                    if self._latest.get(key) == seq:
+                        del self._latest[key]
+            finally:
+                elapsed = time.monotonic() - start
+                self.flush_count += 1
+                self._flush_seconds += elapsed
+                self._max_flush_seconds = max(self._max_flush_seconds, elapsed)
+                self._in_flight -= len(batch)
+
+    def _requeue(self, batch: dict[Hashable, tuple[int, Any]]) -> None:
+        for key, (seq, value) in batch.items():
+            # Una escritura más nueva de la misma clave manda sobre la fallida
+            if self._latest.get(key) == seq:
+                self._pending[key] = (seq, value)
+        if self._pending:
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            # Sin temporizador (flush por tamaño) lo reencolado esperaría al próximo put()
+            self._ensure_timer()
+
+    async def drain(self) -> None:
+        """Espera a los flushes en curso y vuelca lo pendiente (al apagar)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "queue_depth": len(self._pending),
+            "in_flight": self._in_flight,
+            "oldest_age_s": round(time.monotonic() - self._oldest, 3) if self._oldest is not None else None,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "flushed_rows": self.flushed_rows,
+            "flushes": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "avg_flush_ms": round(self._flush_seconds / self.flush_count * 1000, 2) if self.flush_count else None,
+            "max_flush_ms": round(self._max_flush_seconds * 1000, 2),
+        }
@@ -6,7 +6,10 @@ import traceback
 import httpx 
 
 from app.services.scraper import ScraperService
+from app.services.standings import StandingsTracker
 from app.services.database import DatabaseService
+from app.services.match_events import MatchEventTracker
+from app.services.normalizer import normalize_status
 from app.services.points import PointsService
 
 # 1. CONFIGURACIÓN DE LOGGING (Menos ruido)
@@ -25,7 +28,11 @@ class SoccerWorker:
     def __init__(self):
         self.scraper = ScraperService()
         self.db = DatabaseService()
-        self.points_calculator = PointsService()
+        self.points_calculator = PointsService(self.db)
+        # Huellas por partido para no reescribir eventos que no han cambiado
+        self.event_tracker = MatchEventTracker(self.scraper)
+        # Hash por liga para no reescribir clasificaciones idénticas
+        self.standings_tracker = StandingsTracker(self.scraper)
         
         # Estado interno
         self.last_full_update = 0
@@ -40,29 +47,23 @@ class SoccerWorker:
             return obj.get(attr_name, default)
         return default
 
-    def _normalize_status(self, status_raw):
-        """Normaliza el estado del partido a string de forma robusta."""
-        # Caso 1: Es un Enum (MatchStatus.FT), accedemos a su valor real
-        if hasattr(status_raw, 'value'):
-            return str(status_raw.value)
-        # Caso 2: Objeto con propiedad short (ej. objeto raw de FotMob)
-        if hasattr(status_raw, 'short'):
-            return str(status_raw.short)
-        # Caso 3: Diccionario
-        elif isinstance(status_raw, dict):
-            return str(status_raw.get("short", "NS"))
-        # Caso 4: String directo o fallback
-        return str(status_raw)
-
     async def step_fetch_live_data(self):
         """Paso 1: Descargar partidos en vivo y guardar estructura base."""
         logger.info("📡 Buscando partidos en vivo...")
-        matches_data = await self.scraper.get_live_matches_fotmob()
+        matches_data, unchanged = await self.scraper.fetch_live_matches()
         
+        # La resincronización completa periódica se hace aunque el feed no cambie
+        if matches_data and unchanged and not self.db.full_sync_due():
+            # El feed no ha cambiado desde el último ciclo: no hace falta reescribir la DB
+            logger.info(f"♻️ Sin cambios en el feed ({len(matches_data)} ligas), no se guarda.")
+            return matches_data
+
         if matches_data:
             # Upsert masivo (guardar competiciones y partidos)
             # Nota: Esto genera logs HTTP POST internos, pero ya no los verás en consola
-            self.db.save_matches(matches_data)
+            await self.db.save_matches(matches_data)
+            # Solo tras guardar con éxito: si falla, el próximo ciclo lo reintenta
+            self.scraper.mark_saved(matches_data)
             logger.info(f"✅ Datos base guardados: {len(matches_data)} ligas detectadas.")
             return matches_data
         
@@ -82,7 +83,7 @@ class SoccerWorker:
             for match in matches:
                 m_id = self._get_val(match, 'id')
                 status_raw = self._get_val(match, 'status')
-                status = self._normalize_status(status_raw)
+                status = normalize_status(status_raw)
 
                 # Si NO está (No empezado, Cancelado, Suspendido) -> Está vivo o terminó reciente
                 # "FT" entra aquí para actualizar eventos finales (tarjetas post-partido, etc)
@@ -96,10 +97,14 @@ class SoccerWorker:
         if active_matches_ids:
             logger.info(f"🔍 Actualizando detalle (goles/tarjetas) de {len(active_matches_ids)} partidos activos.")
             for mid in active_matches_ids:
-                events = await self.scraper.get_match_details(mid)
-                if events:
-                    self.db.save_match_events(mid, events)
-                await asyncio.sleep(0.2) # Pausa reducida para ir más rápido
+                # Solo se parsean y guardan los partidos cuyo stream de eventos cambió
+                update = await self.event_tracker.poll(mid)
+                if update:
+                    await self.db.save_match_events(mid, update.events)
+                    self.event_tracker.mark_written(update)
+                # Sin pausas fijas: el ritmo lo marca el limitador del scraper
+            events = self.event_tracker.metrics(reset=True)
+            logger.info(f"📝 Eventos: {events['written']} guardados, {events['skipped']} sin cambios.")
         else:
             logger.info("ℹ️ No hay partidos en juego que requieran detalles.")
             
@@ -119,14 +124,15 @@ class SoccerWorker:
 
         if leagues_to_update:
             logger.info(f"📊 Actualizando tablas de {len(leagues_to_update)} ligas...")
-            for lid in leagues_to_update:
+            # Descarga en paralelo; solo se guardan las tablas que han cambiado
+            for update in await self.standings_tracker.poll_many(leagues_to_update):
                 try:
-                    standings = await self.scraper.get_standings(lid)
-                    if standings:
-                        self.db.save_standings(lid, standings)
-                    await asyncio.sleep(0.5)
+                    await self.db.save_standings(update.league_id, update.standings)
+                    self.standings_tracker.mark_written(update)
                 except Exception as e:
-                    logger.error(f"   ⚠️ Fallo en tabla liga {lid}: {e}")
+                    logger.error(f"   ⚠️ Fallo en tabla liga {update.league_id}: {e}")
+            standings = self.standings_tracker.metrics(reset=True)
+            logger.info(f"📊 Tablas: {standings['written']} guardadas, {standings['skipped']} sin cambios.")
         else:
             logger.info("💤 Las clasificaciones están al día.")
 
@@ -140,7 +146,7 @@ class SoccerWorker:
             for match in matches:
                 m_id = self._get_val(match, 'id')
                 status_raw = self._get_val(match, 'status')
-                status = self._normalize_status(status_raw)
+                status = normalize_status(status_raw)
                 result_str = self._get_val(match, 'result')
 
                 # --- DEBUG ESPECÍFICO PARA TU PARTIDO ---
@@ -175,34 +181,39 @@ class SoccerWorker:
     async def run(self):
         logger.info("🚀 INICIANDO WORKER DE FÚTBOL INTELIGENTE")
         
-        while True:
-            start_time = time.time()
-            logger.info("\n--- 🔄 INICIANDO CICLO ---")
+        try:
+            while True:
+                start_time = time.time()
+                logger.info("\n--- 🔄 INICIANDO CICLO ---")
             
-            try:
-                # 1. Obtener datos
-                matches_data = await self.step_fetch_live_data()
+                try:
+                    # 1. Obtener datos
+                    matches_data = await self.step_fetch_live_data()
                 
-                if matches_data:
-                    # 2. Detalles de eventos
-                    leagues_active = await self.step_update_details(matches_data)
+                    if matches_data:
+                        # 2. Detalles de eventos
+                        leagues_active = await self.step_update_details(matches_data)
                     
-                    # 3. Clasificaciones
-                    await self.step_update_standings(leagues_active)
+                        # 3. Clasificaciones
+                        await self.step_update_standings(leagues_active)
                     
-                    # 4. Puntuaciones (Juez)
-                    await self.step_process_finished(matches_data)
+                        # 4. Puntuaciones (Juez)
+                        await self.step_process_finished(matches_data)
                 
-            except Exception as e:
-                logger.critical(f"❌ ERROR CRÍTICO EN EL WORKER: {e}")
-                traceback.print_exc()
+                except Exception as e:
+                    logger.critical(f"❌ ERROR CRÍTICO EN EL WORKER: {e}")
+                    traceback.print_exc()
             
-            # Cálculo del tiempo de espera
-            elapsed = time.time() - start_time
-            sleep_time = max(10, 60 - elapsed) # Mínimo 10 segundos
-            logger.info(f"💤 Ciclo terminado en {elapsed:.2f}s. Durmiendo {sleep_time:.2f}s...")
+                # Cálculo del tiempo de espera
+                elapsed = time.time() - start_time
+                sleep_time = max(10, 60 - elapsed) # Mínimo 10 segundos
+                logger.info(f"💤 Ciclo terminado en {elapsed:.2f}s. Durmiendo {sleep_time:.2f}s...")
             
-            await asyncio.sleep(sleep_time)
+                await asyncio.sleep(sleep_time)
+        finally:
+            # Cerramos los pools de conexiones (FotMob y Supabase) al parar el worker
+            await self.scraper.aclose()
+            await self.db.aclose()
 
 # Punto de entrada
 def main():
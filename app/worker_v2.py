@@ -6,9 +6,13 @@ from datetime import datetime, timedelta
 from typing import Any
 
 from app.core.config import FOTMOB_TARGET_LEAGUE_IDS
+from app.services.bulk_load import default_checkpoint
 from app.services.database import DatabaseService
+from app.services.match_events import MatchEventTracker
+from app.services.normalizer import normalize_status
 from app.services.points import PointsService
 from app.services.scraper import ScraperService
+from app.services.standings import StandingsTracker
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
@@ -25,7 +29,9 @@ class SoccerWorkerV2:
     def __init__(self) -> None:
         self.scraper = ScraperService()
         self.db = DatabaseService()
-        self.points_calculator = PointsService()
+        self.points_calculator = PointsService(self.db)
+        self.event_tracker = MatchEventTracker(self.scraper)
+        self.standings_tracker = StandingsTracker(self.scraper)
 
         self.live_interval_active_seconds = 30
         self.live_interval_idle_seconds = 300
@@ -48,15 +54,6 @@ class SoccerWorkerV2:
             return obj.get(attr_name, default)
         return default
 
-    def _normalize_status(self, status_raw: Any) -> str:
-        if hasattr(status_raw, "value"):
-            return str(status_raw.value)
-        if hasattr(status_raw, "short"):
-            return str(status_raw.short)
-        if isinstance(status_raw, dict):
-            return str(status_raw.get("short", "NS"))
-        return str(status_raw)
-
     def _parse_score(self, result_str: str | None) -> tuple[int, int] | None:
         if not result_str:
             return None
@@ -68,20 +65,17 @@ class SoccerWorkerV2:
             return None
         return int(left), int(right)
 
-    async def _run_db(self, fn, *args):
-        return await asyncio.to_thread(fn, *args)
-
-    async def _update_events_for_matches(self, match_ids: list[int], concurrency: int = 6) -> None:
+    async def _update_events_for_matches(self, match_ids: list[int]) -> None:
         if not match_ids:
             return
 
-        sem = asyncio.Semaphore(concurrency)
-
+        # Concurrency and pacing are enforced by the scraper's shared rate limiter.
+        # Only matches whose event stream changed are parsed and written.
         async def _one(match_id: int) -> None:
-            async with sem:
-                events = await self.scraper.get_match_details(match_id)
-                if events:
-                    await self._run_db(self.db.save_match_events, match_id, events)
+            update = await self.event_tracker.poll(match_id)
+            if update:
+                await self.db.save_match_events(match_id, update.events)
+                self.event_tracker.mark_written(update)
 
         await asyncio.gather(*(_one(mid) for mid in match_ids), return_exceptions=True)
 
@@ -89,13 +83,64 @@ class SoccerWorkerV2:
         if not league_ids:
             return
 
-        for league_id in league_ids:
+        # Fetched concurrently; only tables whose content changed are written
+        for update in await self.standings_tracker.poll_many(league_ids):
             try:
-                standings = await self.scraper.get_standings(league_id)
-                if standings:
-                    await self._run_db(self.db.save_standings, league_id, standings)
+                await self.db.save_standings(update.league_id, update.standings)
+                self.standings_tracker.mark_written(update)
             except Exception as exc:
-                logger.error("Failed standings update for league %s: %s", league_id, exc)
+                logger.error("Failed standings update for league %s: %s", update.league_id, exc)
+
+        standings = self.standings_tracker.metrics(reset=True)
+        logger.info(
+            "Standings: %s written, %s unchanged skipped, %s failed",
+            standings["written"],
+            standings["skipped"],
+            standings["failed"],
+        )
+
+    def _log_http_latency(self) -> None:
+        limiter = self.scraper.rate_limiter.metrics()
+        logger.info(
+            "FotMob limiter: rate %.2f req/s, queue %s, in flight %s, throttled %s, server errors %s",
+            limiter["rate"],
+            limiter["queue_depth"],
+            limiter["in_flight"],
+            limiter["throttled"],
+            limiter["server_errors"],
+        )
+        events = self.event_tracker.metrics(reset=True)
+        logger.info(
+            "Match events: %s written, %s unchanged skipped, %s failed",
+            events["written"],
+            events["skipped"],
+            events["failed"],
+        )
+        for name, buffer in self.db.metrics().items():
+            logger.info(
+                "DB %s: queue %s, in flight %s, coalesced %s, flushes %s (avg %sms, max %sms), errors %s",
+                name,
+                buffer["queue_depth"],
+                buffer["in_flight"],
+                buffer["coalesced"],
+                buffer["flushes"],
+                buffer["avg_flush_ms"],
+                buffer["max_flush_ms"],
+                buffer["flush_errors"],
+            )
+        for endpoint, stats in self.scraper.latency.snapshot(reset=True).items():
+            logger.info(
+                "HTTP %s: %s requests, %s new connections, avg %.1fms "
+                "(connect %.1fms, tls %.1fms, wait %.1fms, receive %.1fms)",
+                endpoint,
+                stats["requests"],
+                stats["new_connections"],
+                stats["avg_total_ms"],
+                stats["avg_connect_ms"],
+                stats["avg_tls_ms"],
+                stats["avg_wait_ms"],
+                stats["avg_receive_ms"],
+            )
 
     def _schedule_settlement(self, match_id: int, result_str: str | None) -> None:
         parsed_score = self._parse_score(result_str)
@@ -119,14 +164,19 @@ class SoccerWorkerV2:
         while True:
             cycle_start = time.time()
             try:
-                matches_data = await self.scraper.get_live_matches_fotmob()
+                matches_data, unchanged = await self.scraper.fetch_live_matches()
 
                 if not matches_data:
                     logger.info("No competitions returned for today")
                     await asyncio.sleep(self.live_interval_idle_seconds)
                     continue
 
-                await self._run_db(self.db.save_matches, matches_data)
+                # The periodic full resync runs on its own schedule, even through quiet hours
+                if unchanged and not self.db.full_sync_due():
+                    logger.info("Daily feed unchanged since last cycle, skipping save_matches")
+                else:
+                    await self.db.save_matches(matches_data)
+                    self.scraper.mark_saved(matches_data)
 
                 active_match_ids: list[int] = []
                 finished_leagues: set[int] = set()
@@ -140,7 +190,7 @@ class SoccerWorkerV2:
                         if not match_id:
                             continue
 
-                        status = self._normalize_status(self._get_val(match, "status", "NS"))
+                        status = normalize_status(self._get_val(match, "status", "NS"))
                         result = self._get_val(match, "result")
 
                         previous = self._match_state.get(match_id)
@@ -173,6 +223,7 @@ class SoccerWorkerV2:
                 elapsed = time.time() - cycle_start
                 sleep_seconds = self.live_interval_active_seconds if active_match_ids else self.live_interval_idle_seconds
                 logger.info("Live cycle completed in %.2fs, sleeping %.2fs", elapsed, sleep_seconds)
+                self._log_http_latency()
                 await asyncio.sleep(sleep_seconds)
 
             except Exception as exc:
@@ -186,20 +237,26 @@ class SoccerWorkerV2:
         while True:
             try:
                 now = time.time()
-                due_match_ids = [
-                    match_id
+                # Todos los partidos vencidos se liquidan juntos: una consulta y
+                # upserts en bloque en vez de dos peticiones por partido
+                due = {
+                    match_id: state["score"]
                     for match_id, state in self._pending_settlements.items()
                     if state["next_run_ts"] <= now
-                ]
-
-                for match_id in due_match_ids:
-                    state = self._pending_settlements.get(match_id)
-                    if not state:
-                        continue
-
-                    home_score, away_score = state["score"]
-                    await self.points_calculator.calculate_match_points(match_id, home_score, away_score)
-
+                }
+                if due:
+                    stats = await self.points_calculator.calculate_many_match_points(due)
+                    logger.info(
+                        "Settled %s matches: %s predictions, %s queries, %s upserts, %s leaderboard totals",
+                        stats["matches"],
+                        stats["predictions"],
+                        stats["select_queries"],
+                        stats["round_trips"],
+                        stats["leaderboard_rows"],
+                    )
+
+                for match_id in due:
+                    state = self._pending_settlements[match_id]
                     attempt = state["attempt"]
                     if attempt < len(self.settlement_retry_delays_seconds):
                         state["attempt"] += 1
@@ -231,15 +288,15 @@ class SoccerWorkerV2:
                 logger.info("Running backfill for last %s day(s)", self.backfill_days)
 
                 today = datetime.now().date()
-                for offset in range(1, self.backfill_days + 1):
-                    day = today - timedelta(days=offset)
-                    day_str = day.strftime("%Y%m%d")
-
-                    competitions = await self.scraper.get_live_matches_fotmob(target_date=day_str)
+                start = today - timedelta(days=self.backfill_days)
+                end = today - timedelta(days=1)
+                # Days are fetched concurrently and processed as each one arrives
+                async for day_str, competitions in self.scraper.iter_matches_for_dates(start, end):
                     if not competitions:
+                        logger.info("No competitions returned for %s", day_str)
                         continue
 
-                    await self._run_db(self.db.save_matches, competitions)
+                    await self.db.save_matches(competitions)
 
                     finished_match_ids: list[int] = []
                     leagues_for_standings: set[int] = set()
@@ -247,7 +304,7 @@ class SoccerWorkerV2:
                     for league in competitions:
                         league_id = int(self._get_val(league, "id", 0) or 0)
                         for match in self._get_val(league, "matches", []):
-                            status = self._normalize_status(self._get_val(match, "status", "NS"))
+                            status = normalize_status(self._get_val(match, "status", "NS"))
                             if status in {"FT", "AET", "AP"}:
                                 match_id = int(self._get_val(match, "id", 0) or 0)
                                 if match_id:
@@ -272,10 +329,32 @@ class SoccerWorkerV2:
                 await self._sleep_until_hour(self.future_seed_hour)
                 logger.info("Running future fixtures seed for %s leagues", len(FOTMOB_TARGET_LEAGUE_IDS))
 
-                for league_id in FOTMOB_TARGET_LEAGUE_IDS:
-                    competitions = await self.scraper.get_all_season_matches(league_id)
-                    if competitions:
-                        await self._run_db(self.db.save_matches, competitions)
+                # Resumable if the worker restarts the same day; cleared after a clean run
+                checkpoint = default_checkpoint(f"future_seed_{datetime.now():%Y%m%d}")
+                failed = 0
+
+                async def _fetch(league_id: int):
+                    return league_id, await self.scraper.get_all_season_matches(league_id)
+
+                # Leagues are fetched concurrently and bulk-loaded as each one arrives
+                for next_done in asyncio.as_completed([_fetch(league_id) for league_id in FOTMOB_TARGET_LEAGUE_IDS]):
+                    league_id, competitions = await next_done
+                    if not competitions:
+                        continue
+                    stats = await self.db.bulk_load_matches(competitions, checkpoint)
+                    failed += stats["failed_chunks"]
+                    logger.info(
+                        "Seeded league %s: %s matches, %s chunks (%s from checkpoint, %s retries, %s failed)",
+                        league_id,
+                        stats["matches"],
+                        stats["chunks"],
+                        stats["skipped_chunks"],
+                        stats["retries"],
+                        stats["failed_chunks"],
+                    )
+
+                if checkpoint is not None and not failed:
+                    checkpoint.clear()
 
             except Exception as exc:
                 logger.error("Error in daily future seed job: %s", exc)
@@ -298,6 +377,8 @@ class SoccerWorkerV2:
             for task in tasks:
                 task.cancel()
             await asyncio.gather(*tasks, return_exceptions=True)
+            await self.scraper.aclose()
+            await self.db.aclose()
 
 
 def main() -> None:
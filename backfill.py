@@ -1,49 +1,39 @@
+import argparse
 import asyncio
 import sys
 import os
+from datetime import datetime
 
 # Aseguramos que Python encuentre el módulo 'app'
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.scraper import ScraperService
 from app.services.database import DatabaseService
+from app.services.normalizer import normalize_status
 
-# --- CONFIGURACIÓN ---
-TARGET_DATE = "20260131"  # Fecha a corregir
-# ---------------------
 
-def normalize_status(raw_status):
-    """Convierte cualquier formato de status (Enum, Dict, Str) a string simple 'FT', 'NS', etc."""
-    # 1. Si es un Enum (tiene .value o .name)
-    if hasattr(raw_status, 'value'): 
-        # Algunos Enums devuelven "MatchStatus.FT", queremos solo "FT"
-        return str(raw_status.value).split('.')[-1]
-    
-    # 2. Si es un Diccionario (lo que devuelve FotMob a veces)
-    if isinstance(raw_status, dict):
-        return raw_status.get("short", "NS")
-    
-    # 3. Si ya es String
-    s = str(raw_status)
-    # Limpiamos "MatchStatus." si aparece
-    return s.replace("MatchStatus.", "")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-descarga y guarda los partidos (y sus eventos) de un rango de fechas.")
+    parser.add_argument("start", help="Fecha inicial YYYYMMDD")
+    parser.add_argument("end", nargs="?", help="Fecha final YYYYMMDD (incluida). Por defecto, la inicial")
+    args = parser.parse_args()
+    start = datetime.strptime(args.start, "%Y%m%d").date()
+    end = datetime.strptime(args.end, "%Y%m%d").date() if args.end else start
+    if end < start:
+        parser.error("La fecha final no puede ser anterior a la inicial")
+    return start, end
 
-async def run_backfill():
-    print(f"🛠️  Iniciando Backfill para fecha: {TARGET_DATE}")
-    
-    scraper = ScraperService()
-    db = DatabaseService()
 
-    # 1. Bajar partidos
-    print("📥 Descargando partidos...")
-    matches_data = await scraper.get_live_matches_fotmob(target_date=TARGET_DATE)
-    
+async def backfill_day(scraper, db, target_date, matches_data):
+    print(f"\n🛠️  Backfill para fecha: {target_date}")
+
+    # 1. Partidos ya descargados por el iterador de fechas
     if not matches_data:
         print("❌ No se encontraron datos.")
         return
 
     # 2. Guardar estructura base
-    db.save_matches(matches_data)
+    await db.save_matches(matches_data)
     print(f"✅ Base guardada ({len(matches_data)} ligas).")
 
     # 3. Filtrar candidatos
@@ -58,7 +48,7 @@ async def run_backfill():
             mid = match.id if hasattr(match, 'id') else match.get('id')
             raw_status = match.status if hasattr(match, 'status') else match.get('status')
             
-            # Usamos la función normalizadora
+            # Usamos el normalizador compartido con los workers
             status = normalize_status(raw_status)
 
             # DEBUG: Imprimir el estado que vemos para entender por qué falla/funciona
@@ -78,17 +68,30 @@ async def run_backfill():
             events = await scraper.get_match_details(mid)
             if events:
                 # Guardamos solo si hay eventos
-                db.save_match_events(mid, events)
+                await db.save_match_events(mid, events)
             else:
                 # Opcional: Si devuelve vacío, quizás el partido fue muy aburrido 0-0 sin tarjetas
                 pass
             
-            await asyncio.sleep(1) # Pausa
-            
         except Exception as e:
             print(f"\n❌ Error en partido {mid}: {e}")
 
+
+async def run_backfill(start, end):
+    print(f"🛠️  Iniciando Backfill del {start:%Y%m%d} al {end:%Y%m%d}")
+
+    scraper = ScraperService()
+    db = DatabaseService()
+
+    # Las fechas se descargan en paralelo y se procesan según van llegando
+    print("📥 Descargando partidos...")
+    try:
+        async for target_date, matches_data in scraper.iter_matches_for_dates(start, end):
+            await backfill_day(scraper, db, target_date, matches_data)
+    finally:
+        await scraper.aclose()
+        await db.aclose()
     print("\n\n✨ ¡Backfill completado!")
 
 if __name__ == "__main__":
-    asyncio.run(run_backfill())
\ No newline at end of file
+    asyncio.run(run_backfill(*parse_args()))
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Benchmark: decodificación del feed `matches?date=`.
+
+Compara el camino antiguo (response.json(): json estándar sobre todo el
+documento), el mismo decode completo con ujson y el selectivo
+(fotmob_decode: índice estructural y decode solo de las ligas objetivo).
+
+Uso:
+    python benchmarks/bench_matches_decode.py [--payload grabacion.json] [--repeat 20]
+
+Sin --payload se genera un feed sintético grande. Imprime JSON con tiempos
+(ms) y pico de memoria (KiB) por camino, de punta a punta (decode + parseo a
+CompetitionData) y solo del decode, con el speedup de cada uno: el parseo
+es común a los tres caminos y diluye la ganancia del decode.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import ujson
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import FOTMOB_TARGET_LEAGUE_IDS
+from app.services.scraper import ScraperService
+from benchmarks.payloads import matches_by_date_payload
+
+
+def legacy_path(scraper: ScraperService, body: bytes):
+    data = json.loads(body)
+    leagues = [league for league in data.get("leagues", []) if league["primaryId"] in FOTMOB_TARGET_LEAGUE_IDS]
+    return scraper._parse_live_matches(leagues)
+
+
+def ujson_path(scraper: ScraperService, body: bytes):
+    data = ujson.loads(body)
+    leagues = [league for league in data.get("leagues", []) if league["primaryId"] in FOTMOB_TARGET_LEAGUE_IDS]
+    return scraper._parse_live_matches(leagues)
+
+
+def selective_path(scraper: ScraperService, body: bytes):
+    return scraper._parse_live_matches(scraper._decode_target_leagues(body))
+
+
+def legacy_decode(scraper: ScraperService, body: bytes):
+    data = json.loads(body)
+    return [league for league in data.get("leagues", []) if league["primaryId"] in FOTMOB_TARGET_LEAGUE_IDS]
+
+
+def selective_decode(scraper: ScraperService, body: bytes):
+    return scraper._decode_target_leagues(body)
+
+
+def measure(fn, scraper: ScraperService, body: bytes, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(scraper, body)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(scraper, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "min_ms": round(timings[0] * 1000, 3),
+        "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", help="Respuesta grabada de matches?date= (JSON)")
+    parser.add_argument("--leagues", type=int, default=400)
+    parser.add_argument("--matches", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, "rb") as f:
+            body = f.read()
+    else:
+        body = json.dumps(matches_by_date_payload(args.leagues, args.matches)).encode()
+
+    scraper = ScraperService()
+    assert legacy_path(scraper, body) == selective_path(scraper, body) == ujson_path(scraper, body)
+
+    results = {
+        "payload_bytes": len(body),
+        "legacy": measure(legacy_path, scraper, body, args.repeat),
+        "ujson_full": measure(ujson_path, scraper, body, args.repeat),
+        "selective": measure(selective_path, scraper, body, args.repeat),
+    }
+    results["speedup"] = round(results["legacy"]["median_ms"] / results["selective"]["median_ms"], 2)
+    results["decode_only"] = {
+        "legacy": measure(legacy_decode, scraper, body, args.repeat),
+        "selective": measure(selective_decode, scraper, body, args.repeat),
+    }
+    results["decode_speedup"] = round(
+        results["decode_only"]["legacy"]["median_ms"] / results["decode_only"]["selective"]["median_ms"], 2
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
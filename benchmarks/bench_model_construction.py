@@ -0,0 +1,102 @@
+"""
+Benchmark: coste de construir los modelos de partido por cada 10k partidos.
+
+Compara, sobre los mismos campos ya normalizados, las estrategias de
+construcción de MatchData + 2 TeamInfo:
+
+- validated: lo que hace hoy el scraper (validación pydantic por objeto).
+- model_construct: camino "trusted" sin validación.
+- type_adapter: validación en bloque con TypeAdapter(list[MatchData]).
+
+y, como referencia, el bucle de parseo completo del scraper.
+
+Uso:
+    python benchmarks/bench_model_construction.py [--matches 10000] [--repeat 5]
+
+Imprime JSON con ms por 10k partidos en cada estrategia.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from pydantic import TypeAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import FOTMOB_TARGET_LEAGUE_IDS
+from app.schemas.match import MatchData, TeamInfo
+from app.services.scraper import ScraperService
+from benchmarks.payloads import matches_by_date_payload
+
+MATCH_LIST_ADAPTER = TypeAdapter(list[MatchData])
+
+
+def field_rows(competitions) -> list[dict]:
+    """Campos ya normalizados de cada partido (con los equipos como dicts)."""
+    return [match.model_dump() for comp in competitions for match in comp.matches]
+
+
+def validated(rows: list[dict]):
+    out = []
+    for row in rows:
+        fields = dict(row)
+        fields["homeTeam"] = TeamInfo(**row["homeTeam"])
+        fields["awayTeam"] = TeamInfo(**row["awayTeam"])
+        out.append(MatchData(**fields))
+    return out
+
+
+def constructed(rows: list[dict]):
+    out = []
+    for row in rows:
+        fields = dict(row)
+        fields["homeTeam"] = TeamInfo.model_construct(**row["homeTeam"])
+        fields["awayTeam"] = TeamInfo.model_construct(**row["awayTeam"])
+        out.append(MatchData.model_construct(**fields))
+    return out
+
+
+def type_adapter(rows: list[dict]):
+    return MATCH_LIST_ADAPTER.validate_python(rows)
+
+
+def best_of(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    n_leagues = len(FOTMOB_TARGET_LEAGUE_IDS)
+    per_league = max(1, args.matches // n_leagues)
+    leagues = matches_by_date_payload(n_leagues=n_leagues, matches_per_league=per_league)["leagues"]
+
+    scraper = ScraperService()
+    rows = field_rows(scraper._parse_live_matches(leagues))
+    scale = 10_000 / len(rows) * 1000
+
+    assert validated(rows) == constructed(rows) == type_adapter(rows)
+
+    print(json.dumps({
+        "matches": len(rows),
+        "ms_per_10k": {
+            "validated": round(best_of(validated, rows, args.repeat) * scale, 2),
+            "model_construct": round(best_of(constructed, rows, args.repeat) * scale, 2),
+            "type_adapter": round(best_of(type_adapter, rows, args.repeat) * scale, 2),
+            "full_parse_loop": round(best_of(scraper._parse_live_matches, leagues, args.repeat) * scale, 2),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
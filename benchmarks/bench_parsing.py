@@ -0,0 +1,141 @@
+"""
+Benchmark: throughput y memoria del parseo de las cuatro respuestas de FotMob.
+
+Sirve payloads sintéticos (benchmarks/payloads.py) a través de un
+MockTransport local, de modo que se mide el camino completo del scraper
+(cliente httpx, decode y normalización) sin red ni limitador:
+
+- get_live_matches_fotmob: feed `matches?date=` con N ligas × M partidos.
+- get_all_season_matches: calendario `leagues?id=` de una liga.
+- get_standings: `tltable?leagueId=` con tablas largas.
+- get_match_details: `matchDetails?matchId=` con K eventos.
+
+Uso:
+    python benchmarks/bench_parsing.py [--leagues 400] [--matches 12] [--events 40]
+        [--season-matches 380] [--teams 20] [--repeat 20] [--output resultados.json]
+
+Imprime (y opcionalmente guarda) un JSON con, por endpoint: tamaño del
+payload, mediana y mínimo en ms, elementos/s y pico de memoria en KiB, para
+comparar versiones entre releases.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.scraper import ScraperService
+from benchmarks.payloads import match_details_payload, matches_by_date_payload, season_payload, standings_payload
+
+
+def build_scraper(bodies: dict[str, bytes]) -> ScraperService:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=bodies[request.url.path], headers={"content-type": "application/json"})
+
+    scraper = ScraperService(transport=httpx.MockTransport(handler))
+    # Sin red real no hay upstream que proteger
+    scraper.rate_limiter.enabled = False
+    return scraper
+
+
+async def live_matches(scraper: ScraperService) -> int:
+    # Sin la caché del feed cada vuelta parsea el cuerpo completo
+    scraper._feed_cache.clear()
+    competitions = await scraper.get_live_matches_fotmob("20260101")
+    return sum(len(comp.matches) for comp in competitions)
+
+
+async def season_matches(scraper: ScraperService) -> int:
+    competitions = await scraper.get_all_season_matches(87)
+    return sum(len(comp.matches) for comp in competitions)
+
+
+async def standings(scraper: ScraperService) -> int:
+    return len(await scraper.get_standings(87))
+
+
+async def match_details(scraper: ScraperService) -> int:
+    return len(await scraper.get_match_details(4_000_000))
+
+
+async def measure(scraper: ScraperService, fn, repeat: int) -> dict:
+    items = await fn(scraper)  # calentamiento (cliente, cachés de normalización)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(scraper)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    await fn(scraper)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+    return {
+        "items": items,
+        "min_ms": round(timings[0] * 1000, 3),
+        "median_ms": round(median * 1000, 3),
+        "items_per_s": round(items / median, 1) if median else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    bodies = {
+        "/api/data/matches": json.dumps(matches_by_date_payload(args.leagues, args.matches)).encode(),
+        "/api/data/leagues": json.dumps(season_payload(n_matches=args.season_matches)).encode(),
+        "/api/data/tltable": json.dumps(standings_payload(n_teams=args.teams)).encode(),
+        "/api/data/matchDetails": json.dumps(match_details_payload(n_events=args.events)).encode(),
+    }
+    cases = {
+        "get_live_matches_fotmob": ("/api/data/matches", live_matches),
+        "get_all_season_matches": ("/api/data/leagues", season_matches),
+        "get_standings": ("/api/data/tltable", standings),
+        "get_match_details": ("/api/data/matchDetails", match_details),
+    }
+
+    results = {}
+    async with build_scraper(bodies) as scraper:
+        for name, (path, fn) in cases.items():
+            results[name] = {"payload_bytes": len(bodies[path]), **await measure(scraper, fn, args.repeat)}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leagues", type=int, default=400)
+    parser.add_argument("--matches", type=int, default=12)
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--season-matches", type=int, default=380)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="fichero donde guardar también el JSON")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": asyncio.run(run(args)),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
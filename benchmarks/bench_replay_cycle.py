@@ -0,0 +1,123 @@
+"""
+Benchmark: ciclos completos del worker contra un archivo grabado, sin red.
+
+Cada ciclo hace lo mismo que el live job: feed diario (petición
+condicional), detalles de los partidos en juego y clasificación de las ligas
+con partidos terminados. No escribe en base de datos.
+
+Grabar un archivo real:
+    FOTMOB_ARCHIVE_MODE=record FOTMOB_ARCHIVE_DIR=fotmob_archive worker-v2
+    (o python -m app.worker_v2)
+
+Uso:
+    python benchmarks/bench_replay_cycle.py [--archive fotmob_archive] [--cycles 50] [--date 20260101]
+
+Sin --archive se genera uno temporal con un feed sintético y un detalle y
+una clasificación genéricos, servidos para cualquier partido o liga. Con un
+archivo real solo el feed diario admite otra fecha; los detalles y
+clasificaciones no grabados dan 404. Imprime JSON con ciclos/s y peticiones.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.schemas.match import MatchStatus
+from app.services.archive import ReplayTransport, ResponseArchive
+from app.services.http_client import MATCHES_FEED_PATH
+from app.services.scraper import ScraperService
+from benchmarks.payloads import matches_by_date_payload
+
+
+# Respuestas mínimas de detalles y clasificación: el replay sirve la misma
+# grabación para cualquier matchId/leagueId (fallback por path).
+_SYNTHETIC_DETAILS = {"content": {"matchFacts": {"events": {"events": [
+    {"type": "Goal", "time": 12, "isHome": True, "newScore": [1, 0], "player": {"id": 1, "name": "Player 1"}},
+    {"type": "Card", "time": 40, "isHome": False, "card": "Yellow", "player": {"id": 2, "name": "Player 2"}},
+]}}}}
+_SYNTHETIC_STANDINGS = [{"data": {"table": {"all": [
+    {"idx": i, "id": i, "name": f"Team {i}", "shortName": f"T{i}", "played": 10, "wins": 5, "draws": 3,
+     "losses": 2, "pts": 18, "scoresStr": "15-9", "goalConDiff": 6}
+    for i in range(1, 21)
+]}}}]
+
+
+def synthetic_archive(root: str, date_str: str) -> ResponseArchive:
+    archive = ResponseArchive(root)
+    headers = {"content-type": "application/json"}
+    base = "GET https://www.fotmob.com/api/data"
+    archive.put(f"{base}/matches?date={date_str}", 200, headers, json.dumps(matches_by_date_payload()).encode())
+    archive.put(f"{base}/matchDetails?matchId=0", 200, headers, json.dumps(_SYNTHETIC_DETAILS).encode())
+    archive.put(f"{base}/tltable?leagueId=0", 200, headers, json.dumps(_SYNTHETIC_STANDINGS).encode())
+    return archive
+
+
+async def run_cycle(scraper: ScraperService, date_str: str) -> dict:
+    competitions, unchanged = await scraper.fetch_live_matches(date_str)
+    # Sin DB en el benchmark: se da el guardado por hecho, como el worker tras save_matches
+    scraper.mark_saved(competitions)
+
+    live_ids = [m.id for comp in competitions for m in comp.matches if m.status == MatchStatus.LIVE]
+    finished_leagues = {int(comp.id) for comp in competitions if any(m.status == MatchStatus.FT for m in comp.matches)}
+
+    await asyncio.gather(*(scraper.get_match_details(match_id) for match_id in live_ids))
+    await asyncio.gather(*(scraper.get_standings(league_id) for league_id in finished_leagues))
+    return {"unchanged": unchanged, "details": len(live_ids), "standings": len(finished_leagues)}
+
+
+async def bench(archive: ResponseArchive, cycles: int, date_str: str, synthetic: bool = False) -> dict:
+    # En replay no hay upstream que proteger: sin limitador
+    settings.FOTMOB_ARCHIVE_MODE = "replay"
+    # El archivo sintético tiene un único detalle y una única clasificación para todos
+    fallback_paths = None if synthetic else (MATCHES_FEED_PATH,)
+    if synthetic:
+        # Todo se sirve por fallback a propósito: sin un aviso por partido
+        logging.getLogger("Archive").setLevel(logging.ERROR)
+    scraper = ScraperService(
+        transport=ReplayTransport(archive, path_fallback=True, fallback_paths=fallback_paths)
+    )
+
+    summaries = []
+    start = time.perf_counter()
+    async with scraper:
+        for _ in range(cycles):
+            summaries.append(await run_cycle(scraper, date_str))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "cycles": cycles,
+        "elapsed_s": round(elapsed, 3),
+        "cycles_per_s": round(cycles / elapsed, 2),
+        "avg_cycle_ms": round(elapsed / cycles * 1000, 3),
+        "requests": scraper.rate_limiter.requests,
+        "unchanged_cycles": sum(s["unchanged"] for s in summaries),
+        "details_per_cycle": summaries[0]["details"] if summaries else 0,
+        "standings_per_cycle": summaries[0]["standings"] if summaries else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--archive", help="directorio grabado con FOTMOB_ARCHIVE_MODE=record")
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--date", default="20260101")
+    args = parser.parse_args()
+
+    if args.archive:
+        result = asyncio.run(bench(ResponseArchive(args.archive), args.cycles, args.date))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = asyncio.run(bench(synthetic_archive(tmp, args.date), args.cycles, args.date, synthetic=True))
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark: puntuación de predicciones, bucle por fila frente a vectorizada.
+
+Compara las dos reglas por fila que había en los servicios (PointsService:
+exact/win/lose; DatabaseService.calculate_predictions_score:
+hit/partial/lose) con las reglas compiladas por defecto de
+app/services/scoring.py sobre lotes sintéticos de predicciones (con un
+pequeño porcentaje de marcadores vacíos en el caso de PointsService), y
+comprueba que los puntos son idénticos y los estados equivalentes
+(hit -> exact, partial -> win).
+
+Uso:
+    python benchmarks/bench_scoring.py [--sizes 1000,100000,1000000] [--repeat 5] [--output resultados.json]
+
+Imprime (y opcionalmente guarda) un JSON con, por tamaño y regla: mediana
+en ms del bucle, de la versión vectorizada partiendo de las filas (dicts,
+como llegan de la DB) y del motor solo con los marcadores ya en columnas,
+predicciones/s y speedups.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.scoring import DEFAULT_RULES, score_arrays, score_predictions
+
+REAL_HOME, REAL_AWAY = 2, 1
+
+# Estados unificados: los de calculate_predictions_score pasan a los de PointsService
+UNIFIED_STATUSES = {"hit": "exact", "partial": "win", "lose": "lose"}
+
+
+def points_loop(predictions: list[dict], real_home: int, real_away: int) -> tuple[list[int], list[str]]:
+    """Reglas por fila de PointsService.calculate_match_points."""
+    points_out, statuses = [], []
+    for pred in predictions:
+        points = 0
+        status = "lose"
+        pred_home = pred.get("home_score")
+        pred_away = pred.get("away_score")
+        if pred_home is not None and pred_away is not None:
+            if pred_home == real_home and pred_away == real_away:
+                points = 3
+                status = "exact"
+            elif (real_home > real_away and pred_home > pred_away) or \
+                 (real_home == real_away and pred_home == pred_away) or \
+                 (real_home < real_away and pred_home < pred_away):
+                points = 1
+                status = "win"
+        points_out.append(points)
+        statuses.append(status)
+    return points_out, statuses
+
+
+def quiniela_loop(predictions: list[dict], home_goals: int, away_goals: int) -> tuple[list[int], list[str]]:
+    """Reglas por fila de DatabaseService.calculate_predictions_score."""
+    points_out, statuses = [], []
+    real_sign = "1" if home_goals > away_goals else ("2" if away_goals > home_goals else "X")
+    for pred in predictions:
+        p_home, p_away = int(pred["home_score"]), int(pred["away_score"])
+        points = 0
+        status = "lose"
+        if p_home == home_goals and p_away == away_goals:
+            points = 3
+            status = "hit"
+        else:
+            pred_sign = "1" if p_home > p_away else ("2" if p_away > p_home else "X")
+            if pred_sign == real_sign:
+                points = 1
+                status = "partial"
+        points_out.append(points)
+        statuses.append(status)
+    return points_out, statuses
+
+
+def synthetic_predictions(n: int, empty_ratio: float, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    predictions = []
+    for i in range(n):
+        empty = rng.random() < empty_ratio
+        predictions.append({
+            "id": i + 1,
+            "user_id": f"user-{i}",
+            "match_id": 4_000_000,
+            "home_score": None if empty else rng.randint(0, 4),
+            "away_score": None if empty else rng.randint(0, 4),
+            "points": None,
+        })
+    return predictions
+
+
+def median_seconds(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def measure(predictions: list[dict], loop, repeat: int) -> dict:
+    rules = DEFAULT_RULES
+    points, statuses = loop(predictions, REAL_HOME, REAL_AWAY)
+    expected = (points, [UNIFIED_STATUSES.get(status, status) for status in statuses])
+    if score_predictions(predictions, REAL_HOME, REAL_AWAY, rules) != expected:
+        raise AssertionError(f"La puntuación compilada difiere del bucle {loop.__name__}")
+
+    loop_s = median_seconds(lambda: loop(predictions, REAL_HOME, REAL_AWAY), repeat)
+    vector_s = median_seconds(lambda: score_predictions(predictions, REAL_HOME, REAL_AWAY, rules), repeat)
+    # Solo el motor, con los marcadores ya en columnas (p. ej. desde un DataFrame)
+    home = np.array([p["home_score"] for p in predictions], dtype=np.float64)
+    away = np.array([p["away_score"] for p in predictions], dtype=np.float64)
+    columns_s = median_seconds(lambda: score_arrays(home, away, REAL_HOME, REAL_AWAY, rules), repeat)
+    n = len(predictions)
+    return {
+        "identical": True,
+        "loop_median_ms": round(loop_s * 1000, 3),
+        "vectorized_median_ms": round(vector_s * 1000, 3),
+        "columns_median_ms": round(columns_s * 1000, 3),
+        "loop_per_s": round(n / loop_s, 1) if loop_s else None,
+        "vectorized_per_s": round(n / vector_s, 1) if vector_s else None,
+        "speedup": round(loop_s / vector_s, 2) if vector_s else None,
+        "columns_speedup": round(loop_s / columns_s, 2) if columns_s else None,
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        # calculate_predictions_score no admite marcadores vacíos (int(None))
+        with_empty = synthetic_predictions(size, empty_ratio=0.02)
+        complete = synthetic_predictions(size, empty_ratio=0.0)
+        results[str(size)] = {
+            "points_service": measure(with_empty, points_loop, args.repeat),
+            "predictions_score": measure(complete, quiniela_loop, args.repeat),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="fichero donde guardar también el JSON")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": run(args),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: tiempo y memoria de la liquidación según el número de predicciones.
+
+Liquida un partido con N predicciones sin puntuar en un SQLite temporal
+(app/services/storage.py) con PointsService, en dos modos:
+
+- paged: páginas de --page-size filas por id (SETTLEMENT_PAGE_SIZE).
+- single: una sola página con todas las filas, como el antiguo select("*").
+
+Con paginación el pico de memoria debería mantenerse plano y el tiempo
+crecer linealmente con N.
+
+Uso:
+    python benchmarks/bench_settlement.py [--sizes 10000,100000,300000] [--page-size 1000]
+        [--output resultados.json]
+
+Imprime (y opcionalmente guarda) un JSON con, por tamaño y modo: consultas,
+tiempo en ms, predicciones/s y pico de memoria en KiB.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.database import DatabaseService
+from app.services.points import PointsService
+from app.services.storage import SQLiteBackend
+
+MATCH_ID = 4_000_000
+
+
+async def seed(db: DatabaseService, n: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    for start in range(0, n, 10_000):
+        await db.backend.upsert("predictions", [
+            {"user_id": f"user-{i}", "match_id": MATCH_ID, "home_score": rng.randint(0, 4), "away_score": rng.randint(0, 4)}
+            for i in range(start, min(start + 10_000, n))
+        ])
+
+
+async def settle(path: str, n: int, page_size: int, traced: bool) -> tuple[dict, float, int]:
+    db = DatabaseService(SQLiteBackend(path))
+    try:
+        await seed(db, n)
+        points = PointsService(db)
+
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        stats = await points.calculate_many_match_points({MATCH_ID: (2, 1)}, page_size=page_size)
+        elapsed = time.perf_counter() - start
+        peak = 0
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        await db.aclose()
+    return stats, elapsed, peak
+
+
+async def measure(tmpdir: str, name: str, n: int, page_size: int) -> dict:
+    # tracemalloc ralentiza mucho: tiempo y memoria en pasadas separadas
+    stats, elapsed, _ = await settle(os.path.join(tmpdir, f"{name}_time.db"), n, page_size, traced=False)
+    _, _, peak = await settle(os.path.join(tmpdir, f"{name}_memory.db"), n, page_size, traced=True)
+    return {
+        "predictions": stats["predictions"],
+        "select_queries": stats["select_queries"],
+        "upserts": stats["round_trips"],
+        "ms": round(elapsed * 1000, 1),
+        "predictions_per_s": round(n / elapsed, 1) if elapsed else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            results[str(size)] = {
+                mode: await measure(tmpdir, f"{mode}_{size}", size, page_size)
+                for mode, page_size in (("paged", args.page_size), ("single", size))
+            }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,300000")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--output", help="fichero donde guardar también el JSON")
+    args = parser.parse_args()
+
+    # Los print() de progreso del servicio van a stderr para no ensuciar el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run(args))
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
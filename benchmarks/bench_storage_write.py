@@ -0,0 +1,170 @@
+"""
+Benchmark: throughput de escritura de los backends de almacenamiento.
+
+Ejecuta el mismo camino de persistencia del worker contra cada backend
+(app/services/storage.py):
+
+- save_matches: sincronización completa (force) de N ligas × M partidos.
+- bulk_load_matches: carga masiva en chunks, como el seed de temporadas.
+- match_events: eventos de todos los partidos por el write-behind + drain.
+- settlement: P predicciones por partido, liquidadas en bloque con PointsService.
+
+El backend sqlite usa un fichero temporal (o --sqlite-path). El backend
+supabase escribe de verdad en SUPABASE_URL con filas sintéticas (ids desde
+4.000.000): usarlo solo contra un proyecto de pruebas.
+
+Uso:
+    python benchmarks/bench_storage_write.py [--backends sqlite,supabase] [--leagues 29]
+        [--matches 12] [--predictions 200] [--settle-matches 10] [--repeat 3]
+        [--sqlite-path bench.db] [--output resultados.json]
+
+Imprime (y opcionalmente guarda) un JSON con, por backend y caso: filas
+escritas, mediana en ms y filas/s.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas.match import CompetitionData
+from app.services.database import DatabaseService
+from app.services.fotmob_decode import decode_target_leagues
+from app.services.points import PointsService
+from app.services.scraper import ScraperService
+from app.services.storage import SQLiteBackend, StorageBackend, build_storage_backend
+from benchmarks.payloads import matches_by_date_payload
+
+
+def build_competitions(n_leagues: int, matches_per_league: int) -> list[CompetitionData]:
+    payload = matches_by_date_payload(n_leagues, matches_per_league)
+    league_ids = {league["primaryId"] for league in payload["leagues"]}
+    leagues = decode_target_leagues(json.dumps(payload).encode(), league_ids)
+    return ScraperService()._parse_live_matches(leagues)
+
+
+async def save_matches(db: DatabaseService, competitions: list[CompetitionData], args) -> int:
+    stats = await db.save_matches(competitions, force=True)
+    return stats["competitions"] + stats["matches"]
+
+
+async def bulk_load(db: DatabaseService, competitions: list[CompetitionData], args) -> int:
+    stats = await db.bulk_load_matches(competitions)
+    return stats["competitions"] + stats["matches"]
+
+
+async def match_events(db: DatabaseService, competitions: list[CompetitionData], args) -> int:
+    rows = 0
+    for comp in competitions:
+        for match in comp.matches:
+            await db.save_match_events(match.id, [{"type": 36, "minute": 10, "team": match.homeId}])
+            rows += 1
+    await db.drain()
+    return rows
+
+
+async def settlement(db: DatabaseService, competitions: list[CompetitionData], args) -> tuple[int, float]:
+    match_ids = [match.id for comp in competitions for match in comp.matches][:args.settle_matches]
+    # Predicciones nuevas sin puntuar en cada vuelta (la preparación no se cronometra)
+    for match_id in match_ids:
+        await db.backend.upsert("predictions", [
+            {"user_id": f"bench-{i}", "match_id": match_id, "home_score": i % 4, "away_score": i % 3}
+            for i in range(args.predictions)
+        ])
+
+    points = PointsService(db)
+    start = time.perf_counter()
+    await points.calculate_many_match_points({match_id: (2, 1) for match_id in match_ids})
+    return len(match_ids) * args.predictions, time.perf_counter() - start
+
+
+async def measure(db: DatabaseService, competitions: list[CompetitionData], fn, args) -> dict:
+    await fn(db, competitions, args)  # calentamiento (conexión, esquema, interning)
+
+    timings = []
+    rows = 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = await fn(db, competitions, args)
+        elapsed = time.perf_counter() - start
+        # settlement devuelve su propio tiempo para no contar la preparación
+        rows, elapsed = result if isinstance(result, tuple) else (result, elapsed)
+        timings.append(elapsed)
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+    return {
+        "rows": rows,
+        "min_ms": round(timings[0] * 1000, 3),
+        "median_ms": round(median * 1000, 3),
+        "rows_per_s": round(rows / median, 1) if median else None,
+    }
+
+
+def make_backend(kind: str, tmpdir: str, args) -> StorageBackend:
+    if kind == "sqlite":
+        return SQLiteBackend(args.sqlite_path or os.path.join(tmpdir, "bench.db"))
+    return build_storage_backend(kind)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    competitions = build_competitions(args.leagues, args.matches)
+    cases = {
+        "save_matches": save_matches,
+        "bulk_load_matches": bulk_load,
+        "match_events": match_events,
+        "settlement": settlement,
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for kind in args.backends.split(","):
+            db = DatabaseService(make_backend(kind.strip(), tmpdir, args))
+            try:
+                results[db.backend.name] = {
+                    name: await measure(db, competitions, fn, args) for name, fn in cases.items()
+                }
+            finally:
+                await db.aclose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="sqlite", help="lista separada por comas: sqlite,supabase")
+    parser.add_argument("--leagues", type=int, default=29)
+    parser.add_argument("--matches", type=int, default=12)
+    parser.add_argument("--predictions", type=int, default=200, help="predicciones por partido liquidado")
+    parser.add_argument("--settle-matches", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sqlite-path", help="fichero SQLite (por defecto uno temporal)")
+    parser.add_argument("--output", help="fichero donde guardar también el JSON")
+    args = parser.parse_args()
+
+    # Los print() de progreso del servicio van a stderr para no ensuciar el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run(args))
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
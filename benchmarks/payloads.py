@@ -0,0 +1,171 @@
+"""
+Payloads sintéticos con la forma de las respuestas de FotMob, para
+benchmarks sin red.
+"""
+import random
+
+from app.core.config import FOTMOB_TARGET_LEAGUE_IDS
+
+
+def _team(team_id: int, score: int) -> dict:
+    return {"id": team_id, "name": f"Team {team_id} FC", "longName": f"Team {team_id} Football Club", "score": score}
+
+
+def _match(match_id: int, league_id: int, rng: random.Random) -> dict:
+    home_score, away_score = rng.randint(0, 4), rng.randint(0, 4)
+    state = rng.choice(["ns", "live", "ft"])
+    status = {
+        "utcTime": f"2026-01-{rng.randint(1, 28):02d}T{rng.randint(12, 21)}:00:00Z",
+        "started": state != "ns",
+        "finished": state == "ft",
+        "cancelled": False,
+        "scoreStr": f"{home_score} - {away_score}",
+        "reason": {"short": "FT" if state == "ft" else "", "long": "Full-Time" if state == "ft" else ""},
+    }
+    if state == "live":
+        status["liveTime"] = {"short": f"{rng.randint(1, 90)}'", "long": "", "maxTime": 90}
+    return {
+        "id": match_id,
+        "leagueId": league_id,
+        "time": "01.01.2026 15:00",
+        "round": str(rng.randint(1, 38)),
+        "home": _team(match_id * 2, home_score),
+        "away": _team(match_id * 2 + 1, away_score),
+        "eliminatedTeamId": None,
+        "statusId": 6,
+        "tournamentStage": "1",
+        "status": status,
+        "timeTS": 1767279600000,
+    }
+
+
+def matches_by_date_payload(n_leagues: int = 400, matches_per_league: int = 12, seed: int = 7) -> dict:
+    """Feed de `matches?date=`: todas las ligas del día, de las que solo unas pocas son objetivo."""
+    rng = random.Random(seed)
+    targets = sorted(FOTMOB_TARGET_LEAGUE_IDS)
+    leagues = []
+    match_id = 4_000_000
+    for i in range(n_leagues):
+        league_id = targets[i] if i < len(targets) else 100_000 + i
+        matches = []
+        for _ in range(matches_per_league):
+            matches.append(_match(match_id, league_id, rng))
+            match_id += 1
+        leagues.append({
+            "ccode": "ENG",
+            "id": league_id,
+            "primaryId": league_id,
+            "name": f"League {league_id}",
+            "matches": matches,
+        })
+    rng.shuffle(leagues)
+    return {"leagues": leagues, "date": "20260101"}
+
+
+_EVENT_TYPES = ("Goal", "Card", "Substitution", "Half", "AddedTime")
+
+
+def _player(player_id: int) -> dict:
+    return {"id": player_id, "name": f"Player {player_id}", "profileUrl": f"/players/{player_id}"}
+
+
+def _event(i: int, rng: random.Random, score: list[int]) -> dict:
+    event_type = rng.choice(_EVENT_TYPES)
+    is_home = rng.random() < 0.5
+    event = {
+        "type": event_type,
+        "time": min(90, 1 + i * 3),
+        "timeStr": str(min(90, 1 + i * 3)),
+        "isHome": is_home,
+        "eventId": 90_000_000 + i,
+    }
+    if event_type == "Goal":
+        score[0 if is_home else 1] += 1
+        event.update({
+            "player": _player(rng.randint(1, 10_000)),
+            "assistInput": f"Player {rng.randint(1, 10_000)}",
+            "ownGoal": rng.random() < 0.05,
+            "newScore": list(score),
+        })
+    elif event_type == "Card":
+        event.update({"player": _player(rng.randint(1, 10_000)), "card": rng.choice(["Yellow", "Red"])})
+    elif event_type == "Substitution":
+        event["swap"] = [_player(rng.randint(1, 10_000)), _player(rng.randint(1, 10_000))]
+    elif event_type == "Half":
+        event["halfStrShort"] = "HT"
+    else:
+        event["minutesAddedStr"] = f"+{rng.randint(1, 8)}"
+    if "newScore" not in event:
+        event["homeScore"], event["awayScore"] = score
+    return event
+
+
+def match_details_payload(n_events: int = 40, match_id: int = 4_000_000, seed: int = 7) -> dict:
+    """Respuesta de `matchDetails?matchId=` con n_events eventos en matchFacts."""
+    rng = random.Random(seed)
+    score = [0, 0]
+    events = [_event(i, rng, score) for i in range(n_events)]
+    return {
+        "general": {"matchId": match_id, "started": True, "finished": False},
+        "header": {"teams": [_team(match_id * 2, score[0]), _team(match_id * 2 + 1, score[1])]},
+        "content": {
+            "matchFacts": {
+                "matchId": match_id,
+                "events": {"ongoing": True, "events": events},
+                # Bloques que el parser no usa pero que sí pesan en la respuesta real
+                "infoBox": {"Stadium": {"name": "Stadium", "city": "City", "capacity": 40_000}},
+                "topPlayers": {"homeTopPlayers": [_player(i) for i in range(3)]},
+            },
+            "stats": {"Periods": {"All": {"stats": [{"title": f"Stat {i}", "stats": [i, i + 1]} for i in range(30)]}}},
+        },
+    }
+
+
+def season_payload(league_id: int = 87, n_matches: int = 380, seed: int = 7) -> dict:
+    """Respuesta de `leagues?id=`: calendario completo en fixtures.allMatches."""
+    rng = random.Random(seed)
+    matches = []
+    for i in range(n_matches):
+        match = _match(5_000_000 + i, league_id, rng)
+        # El calendario usa pageUrl y no trae 'time' ni liveTime
+        match.pop("time")
+        match["status"].pop("liveTime", None)
+        match["pageUrl"] = f"/matches/{match['id']}"
+        matches.append(match)
+    return {
+        "details": {"id": league_id, "name": f"League {league_id}", "country": "ESP", "type": "league"},
+        "fixtures": {"allMatches": matches, "firstUnplayedMatch": {"firstUnplayedMatchIndex": n_matches // 2}},
+        "table": [],
+        "stats": {"players": [], "teams": []},
+    }
+
+
+def standings_payload(n_teams: int = 20, form_length: int = 5, seed: int = 7) -> list:
+    """Respuesta de `tltable?leagueId=` (formato 'table') con n_teams filas."""
+    rng = random.Random(seed)
+    rows = []
+    team_form = {}
+    for i in range(n_teams):
+        team_id = 8_000 + i
+        wins, draws, losses = rng.randint(0, 20), rng.randint(0, 10), rng.randint(0, 15)
+        goals_for, goals_against = rng.randint(10, 80), rng.randint(10, 80)
+        rows.append({
+            "idx": i + 1,
+            "id": team_id,
+            "name": f"Team {team_id} FC",
+            "shortName": f"T{team_id}",
+            "pageUrl": f"/teams/{team_id}",
+            "played": wins + draws + losses,
+            "wins": wins,
+            "draws": draws,
+            "losses": losses,
+            "scoresStr": f"{goals_for}-{goals_against}",
+            "goalConDiff": goals_for - goals_against,
+            "pts": wins * 3 + draws,
+            "qualColor": None,
+        })
+        team_form[str(team_id)] = [
+            {"result": rng.choice([-1, 0, 1]), "resultString": rng.choice("WDL"), "score": "1-0", "tooltipText": {}}
+            for _ in range(form_length)
+        ]
+    return [{"data": {"leagueId": 87, "table": {"all": rows}, "teamForm": team_form}}]
@@ -0,0 +1,24 @@
+# rebuild_leaderboard.py
+import argparse
+import asyncio
+from app.services.database import DatabaseService
+from app.services.leaderboard import LeaderboardService
+
+
+async def rebuild(page_size: int | None = None):
+    print("🏆 Recalculando la clasificación desde predictions...")
+
+    db = DatabaseService()
+    try:
+        # La liquidación mantiene los totales a partir de aquí
+        stats = await LeaderboardService(db).rebuild(page_size)
+    finally:
+        await db.aclose()
+
+    print(f"✅ {stats['predictions']} predicciones recorridas, {stats['totals']} totales escritos.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula los totales de la clasificación (arranque o resincronización).")
+    parser.add_argument("--page-size", type=int, help="Predicciones por página (por defecto SETTLEMENT_PAGE_SIZE)")
+    asyncio.run(rebuild(parser.parse_args().page_size))
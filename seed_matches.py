@@ -1,39 +1,65 @@
 # seed_season.py
+import argparse
 import asyncio
 from app.core.config import FOTMOB_TARGET_LEAGUE_IDS
+from app.services.bulk_load import default_checkpoint
 from app.services.scraper import ScraperService
 from app.services.database import DatabaseService
 
 TARGET_LEAGUES = FOTMOB_TARGET_LEAGUE_IDS
 
-async def seed():
+
+async def seed(reset: bool = False):
     print("🌱 Iniciando SEED de temporada completa...")
     
     scraper = ScraperService()
     db = DatabaseService()
+    # Si un seed anterior se cayó, se retoma saltando los chunks ya escritos
+    checkpoint = default_checkpoint("seed_matches")
+    if checkpoint is not None and reset:
+        checkpoint.clear()
+
+    failed = 0
 
-    for league_id in TARGET_LEAGUES:
-        print(f"\n--- Procesando Liga ID: {league_id} ---")
-        
+    async def fetch(league_id):
         # 1. Obtener TODOS los partidos (J1 a J38)
-        competitions_data = await scraper.get_all_season_matches(league_id)
-        
-        if competitions_data:
-            total_matches = len(competitions_data[0].matches)
-            print(f"📥 Descargados {total_matches} partidos.")
-            
-            # 2. Guardar en Supabase
-            # Tu función save_matches ya hace "upsert", así que si el partido existe, lo actualiza; si no, lo crea.
-            db.save_matches(competitions_data)
-            print("💾 Guardados en base de datos.")
-                
-        else:
-            print("⚠️ No se encontraron datos.")
-            
-        # Pausa para ser amables con la API
-        await asyncio.sleep(2)
-
-    print("\n✅ Proceso de seed terminado exitosamente.")
+        return league_id, await scraper.get_all_season_matches(league_id)
+
+    try:
+        # Las ligas se descargan en paralelo (bajo el limitador) y se cargan según llegan
+        for next_done in asyncio.as_completed([fetch(league_id) for league_id in TARGET_LEAGUES]):
+            league_id, competitions_data = await next_done
+            print(f"\n--- Procesando Liga ID: {league_id} ---")
+
+            if competitions_data:
+                total_matches = len(competitions_data[0].matches)
+                print(f"📥 Descargados {total_matches} partidos.")
+
+                # 2. Guardar en Supabase por chunks (upsert: si el partido existe, lo actualiza; si no, lo crea)
+                stats = await db.bulk_load_matches(competitions_data, checkpoint)
+                failed += stats["failed_chunks"]
+                print(
+                    f"💾 Guardados en base de datos: {stats['chunks']} chunks, "
+                    f"{stats['skipped_chunks']} ya en checkpoint, {stats['retries']} reintentos, "
+                    f"{stats['failed_chunks']} fallidos."
+                )
+            else:
+                failed += 1
+                print("⚠️ No se encontraron datos.")
+            # Sin pausa fija: el limitador del scraper ya es amable con la API
+    finally:
+        await scraper.aclose()
+        await db.aclose()
+
+    if failed:
+        print(f"\n⚠️ Seed terminado con {failed} fallos. Vuelve a lanzarlo para reintentar solo lo pendiente.")
+    else:
+        if checkpoint is not None:
+            checkpoint.clear()
+        print("\n✅ Proceso de seed terminado exitosamente.")
+
 
 if __name__ == "__main__":
-    asyncio.run(seed())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed de las temporadas completas de las ligas objetivo.")
+    parser.add_argument("--reset", action="store_true", help="Ignora el checkpoint de un seed anterior")
+    asyncio.run(seed(parser.parse_args().reset))